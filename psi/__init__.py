@@ -53,6 +53,23 @@ def get_config_file():
     return Path(os.environ.get('PSI_CONFIG', default))
 
 
+def get_cache_folder(*subfolders):
+    '''
+    Return folder for cached data, creating it if needed
+
+    Uses the CACHE_ROOT setting if available. Older configuration files do not
+    define this setting, so fall back to a folder alongside the configuration
+    file.
+    '''
+    try:
+        path = Path(get_config('CACHE_ROOT'))
+    except (AttributeError, SystemError):
+        path = get_config_folder() / 'cache'
+    path = path.joinpath(*subfolders)
+    path.mkdir(exist_ok=True, parents=True)
+    return path
+
+
 def create_config(base_directory=None):
     config_template = Path(__file__).parent / 'templates' / 'config.txt'
     target = get_config_file()
@@ -7,6 +7,11 @@ PREFERENCES_WILDCARD = 'Preferences (*.preferences)'
 LAYOUT_WILDCARD = 'Workspace layout (*.layout)'
 CAL_WILDCARD = 'Cal (*.cal)'
 
+# If True, expensive calculations used to generate tokens (e.g., filter design
+# for equalizing noise to the calibration) are saved to the cache folder and
+# reused across sessions.
+PERSIST_TOKEN_CACHE = False
+
 # Options for pump syringe
 SYRINGE_DEFAULT = 'Popper 20cc (glass)'
 SYRINGE_DATA = {
@@ -57,13 +57,167 @@ Notes for developers
 import logging
 log = logging.getLogger(__name__)
 
-from functools import wraps
+from functools import reduce, wraps
 import collections
+import collections.abc
+import operator
 
 import numpy as np
 from numpy.random import RandomState
 
 
+class LazySequence(collections.abc.Sequence):
+    '''
+    Base class for immutable sequences that compute elements on demand
+
+    Subclasses implement `__len__` and `_get(i)` for a non-negative index.
+    Since the sequence is immutable, a full slice (used by `check_sequence` to
+    make a shallow copy) returns the sequence itself rather than materializing
+    it.
+    '''
+
+    def _get(self, i):
+        raise NotImplementedError
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            if i == slice(None):
+                return self
+            return [self._get(j) for j in range(*i.indices(len(self)))]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not (0 <= i < n):
+            raise IndexError('Sequence index out of range')
+        return self._get(i)
+
+
+class Product(LazySequence):
+    '''
+    Index-addressable cartesian product of sequences
+
+    Equivalent to `list(itertools.product(*sequences))`, but elements are
+    computed from the index when requested. The first sequence is the
+    slowest-varying and the last is the fastest-varying.
+
+    Parameters
+    ----------
+    sequences : list of sequences
+        Values for each position in the product.
+    keys : {None, list}
+        If provided, each element is returned as a dictionary mapping keys to
+        values rather than as a tuple.
+
+    Example
+    -------
+    >>> product = Product([[1, 2], ['a', 'b', 'c']])
+    >>> len(product)
+    6
+    >>> product[4]
+    (2, 'b')
+    >>> product[-1]
+    (2, 'c')
+    '''
+
+    def __init__(self, sequences, keys=None):
+        self._sequences = [list(s) for s in sequences]
+        self._keys = keys
+        self._sizes = [len(s) for s in self._sequences]
+        self._n = reduce(operator.mul, self._sizes, 1)
+
+    def __len__(self):
+        return self._n
+
+    def _get(self, i):
+        values = []
+        for sequence, size in zip(self._sequences[::-1], self._sizes[::-1]):
+            i, j = divmod(i, size)
+            values.append(sequence[j])
+        values = tuple(values[::-1])
+        if self._keys is None:
+            return values
+        return dict(zip(self._keys, values))
+
+
+class Permutation(LazySequence):
+    '''
+    Seeded pseudorandom permutation of `range(n)` that uses constant memory
+
+    The permutation is computed from the index using a small Feistel network
+    over the smallest power of two that can hold `n`. Indices that map outside
+    of `range(n)` are re-encrypted until they fall inside it (cycle walking).
+    This allows a random ordering of a very large sequence (e.g., a cartesian
+    product) without materializing and shuffling it.
+
+    Parameters
+    ----------
+    n : int
+        Size of the permutation.
+    seed : {None, int}
+        Seed for random number generator used to generate the round keys.
+
+    Example
+    -------
+    >>> permutation = Permutation(10, seed=1)
+    >>> sorted(permutation) == list(range(10))
+    True
+    '''
+
+    def __init__(self, n, seed=None, rounds=4):
+        self._n = n
+        bits = max(2, int(n - 1).bit_length())
+        bits += bits % 2
+        self._half = bits // 2
+        self._mask = (1 << self._half) - 1
+        state = RandomState(seed)
+        self._keys = [int(k) for k in state.randint(0, 2**31, size=rounds)]
+
+    def __len__(self):
+        return self._n
+
+    def _round(self, x, key):
+        x = ((x ^ key) * 0x9E3779B1) & 0xFFFFFFFF
+        x ^= x >> 16
+        x = (x * 0x85EBCA6B) & 0xFFFFFFFF
+        x ^= x >> 13
+        return x & self._mask
+
+    def _encrypt(self, x):
+        left, right = x >> self._half, x & self._mask
+        for key in self._keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << self._half) | right
+
+    def _get(self, i):
+        i = self._encrypt(i)
+        while i >= self._n:
+            i = self._encrypt(i)
+        return i
+
+
+class Permuted(LazySequence):
+    '''
+    View of a sequence in a seeded pseudorandom order
+
+    Parameters
+    ----------
+    sequence : sequence
+        Sequence to permute. Elements are only requested when accessed.
+    seed : {None, int}
+        Seed for the permutation.
+    '''
+
+    def __init__(self, sequence, seed=None):
+        self._sequence = sequence
+        self._permutation = Permutation(len(sequence), seed)
+
+    def __len__(self):
+        return len(self._sequence)
+
+    def _get(self, i):
+        return self._sequence[self._permutation[i]]
+
+
 def check_sequence(f):
     '''
     Used to ensure that the sequence has at least one item and passes a shallow
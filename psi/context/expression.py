@@ -1,6 +1,8 @@
 import logging
 log = logging.getLogger(__name__)
 
+from functools import lru_cache
+
 from atom.api import Atom, Typed
 from psi.util import get_dependencies
 
@@ -17,7 +19,17 @@ class Expr(object):
         self._dependencies = get_dependencies(expression)
 
     def evaluate(self, context):
-        return eval(self._expression, context)
+        return eval(self._code, context)
+
+
+@lru_cache(maxsize=4096)
+def make_expr(expression):
+    '''
+    Return compiled expression, reusing the compiled code for expressions
+    that have been seen before (e.g., values that do not change from trial to
+    trial).
+    '''
+    return Expr(expression)
 
 
 class ExpressionNamespace(Atom):
@@ -26,6 +38,17 @@ class ExpressionNamespace(Atom):
     _expressions = Typed(dict, {})
     _globals = Typed(dict, {})
 
+    # Namespace that expressions are evaluated in (globals overridden by the
+    # computed values). Set to None whenever it needs to be rebuilt.
+    _frame = Typed(dict)
+
+    # Cache of evaluation plans keyed by the requested names (and the names
+    # whose values are already known). Each plan lists
+    # the names to evaluate in dependency order. Plans only depend on the
+    # names each expression references, so they are kept as long as the
+    # dependency graph does not change.
+    _plans = Typed(dict, {})
+
     def __init__(self, expressions=None, globals=None):
         if globals is None:
             globals = {}
@@ -33,13 +56,21 @@ class ExpressionNamespace(Atom):
             expressions = {}
         self._locals = {}
         self._globals = globals
-        self._expressions = {k: Expr(str(v)) for k, v in expressions.items()}
+        self._expressions = {k: make_expr(str(v)) for k, v in expressions.items()}
 
     def update_expressions(self, expressions):
-        self._expressions.update({k: Expr(str(v)) for k, v in expressions.items()})
+        new = {k: make_expr(str(v)) for k, v in expressions.items()}
+        for k, expr in new.items():
+            old = self._expressions.get(k)
+            if old is None or old._dependencies != expr._dependencies:
+                self._plans = {}
+                break
+        self._expressions.update(new)
 
     def update_symbols(self, symbols):
         self._globals.update(symbols)
+        self._frame = None
+        self._plans = {}
 
     def reset(self, context_item_names=None):
         '''
@@ -47,29 +78,121 @@ class ExpressionNamespace(Atom):
         preparation for the next cycle.
         '''
         self._locals = {}
+        self._frame = None
 
     def get_value(self, name, context=None):
         if name not in self._locals:
-            self._evaluate_value(name, context)
+            if context:
+                self._evaluate_value(name, context)
+            else:
+                self._evaluate_plan(self._get_plan((name,)))
         return self._locals[name]
 
     def get_values(self, names=None, context=None):
         if names is None:
             names = self._expressions.keys()
-        for name in names:
-            if name not in self._locals:
-                self._evaluate_value(name, context)
+        if context:
+            for name in names:
+                if name not in self._locals:
+                    self._evaluate_value(name, context)
+        else:
+            self._evaluate_plan(self._get_plan(tuple(names)))
         return dict(self._locals.copy())
 
     def set_value(self, name, value):
         _locals = self._locals.copy()
         _locals[name] = value
         self._locals = _locals
+        self._frame = None
 
     def set_values(self, values):
         _locals = self._locals.copy()
         _locals.update(values)
         self._locals = _locals
+        self._frame = None
+
+    def _is_dependency(self, name):
+        return name in self._expressions and name not in self._globals
+
+    def get_dependents(self, names):
+        '''
+        Return names of all expressions that depend, directly or indirectly,
+        on any of the provided names.
+        '''
+        dependents = set()
+        pending = set(names)
+        while pending:
+            pending = {n for n, e in self._expressions.items() \
+                       if n not in dependents \
+                       and pending.intersection(e._dependencies)}
+            dependents.update(pending)
+        return dependents
+
+    def _get_plan(self, names):
+        # Values that have already been computed (or set explicitly) are not
+        # expanded, so their dependencies are not evaluated. The plan
+        # therefore depends on which values are already known.
+        known = frozenset(self._locals.keys() & self._expressions.keys())
+        key = names, known
+        if key in self._plans:
+            return self._plans[key]
+
+        # Depth-first topological sort. This visits expressions in the same
+        # order as the recursive evaluation, so expressions that consume
+        # random numbers see the same sequence.
+        plan = []
+        done = set()
+        for name in names:
+            if name in done:
+                continue
+            stack = [(name, False)]
+            pending = set()
+            while stack:
+                node, expanded = stack.pop()
+                if expanded:
+                    pending.discard(node)
+                    if node not in done:
+                        done.add(node)
+                        plan.append(node)
+                    continue
+                if node in done:
+                    continue
+                if node in self._locals:
+                    done.add(node)
+                    continue
+                if node in pending:
+                    raise ValueError(f'Circular dependency involving {node}')
+                pending.add(node)
+                stack.append((node, True))
+                expr = self._expressions.get(node)
+                if expr is not None:
+                    deps = [d for d in expr._dependencies \
+                            if self._is_dependency(d) and d not in done]
+                    for d in reversed(deps):
+                        stack.append((d, False))
+        if len(self._plans) >= 256:
+            self._plans = {}
+        self._plans[key] = plan
+        return plan
+
+    def _get_frame(self):
+        if self._frame is None:
+            frame = self._globals.copy()
+            frame.update(self._locals)
+            self._frame = frame
+        return self._frame
+
+    def _evaluate_plan(self, plan):
+        _locals = self._locals
+        expressions = self._expressions
+        frame = self._get_frame()
+        for name in plan:
+            if name in _locals:
+                continue
+            # Raises a KeyError if the name is neither an expression nor a
+            # value that was set explicitly.
+            value = eval(expressions[name]._code, frame)
+            _locals[name] = frame[name] = value
 
     def _evaluate_value(self, name, context=None):
         if context is None:
@@ -80,8 +203,7 @@ class ExpressionNamespace(Atom):
             return
 
         expr = self._expressions[name]
-        c = self._globals.copy()
-        c.update(self._locals)
+        c = self._get_frame().copy()
         c.update(context)
 
         # Build a context dictionary containing the dependencies required for
@@ -94,3 +216,4 @@ class ExpressionNamespace(Atom):
         # that the GUI was updated as needed; however, this proved to be a very
         # slow process since it triggered a cascade of GUI updates. 
         self._locals[name] = expr.evaluate(c)
+        self._frame = None
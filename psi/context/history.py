@@ -0,0 +1,177 @@
+import logging
+log = logging.getLogger(__name__)
+
+import numpy as np
+import pandas as pd
+
+from atom.api import Atom, Int, Typed
+
+
+def _column_dtype(value, hint=None):
+    # Only numeric and boolean values are stored in typed columns. Everything
+    # else (e.g., strings, which numpy would store as fixed-width, and arrays)
+    # is stored as Python objects.
+    if hint is not None:
+        try:
+            dtype = np.dtype(hint)
+            if dtype.kind in 'biuf':
+                return dtype
+        except TypeError:
+            pass
+    value = np.asarray(value)
+    if value.ndim == 0 and value.dtype.kind in 'biuf':
+        return value.dtype
+    return np.dtype(object)
+
+
+class TrialHistory(Atom):
+    '''
+    Column-oriented store of the context values used on each trial
+
+    Each column is stored as a list of fixed-size chunks, so appending a trial
+    does not copy prior trials. Columns are typed using the dtype hint for the
+    context item (if available) or the first value stored in the column. If a
+    later value cannot be safely cast to the column type, the column is
+    promoted (e.g., from integer to float, or to object).
+
+    Values that were not provided for a trial (e.g., a result that is only
+    recorded on some trials) are tracked so that `get_values` returns the
+    same keys that were saved for that trial.
+    '''
+    #: Number of trials in each chunk
+    chunk_size = Int(1024)
+
+    #: Number of trials stored. Observe this to be notified when trials are
+    #: added.
+    n_trials = Int(0)
+
+    #: Mapping of column name to dtype used when the column is created.
+    dtypes = Typed(dict, {})
+
+    _data = Typed(dict, {})
+    _valid = Typed(dict, {})
+
+    # Python types that are known to be safe to store in each column. This
+    # avoids checking the cast on each append.
+    _types = Typed(dict, {})
+
+    def __len__(self):
+        return self.n_trials
+
+    def _new_chunk(self, dtype):
+        if dtype.kind == 'f':
+            return np.full(self.chunk_size, np.nan, dtype=dtype)
+        elif dtype.kind == 'O':
+            return np.full(self.chunk_size, None, dtype=dtype)
+        return np.zeros(self.chunk_size, dtype=dtype)
+
+    def _add_column(self, name, value):
+        dtype = _column_dtype(value, self.dtypes.get(name, None))
+        n_chunks = self.n_trials // self.chunk_size + 1
+        self._data[name] = [self._new_chunk(dtype) for i in range(n_chunks)]
+        self._valid[name] = [np.zeros(self.chunk_size, dtype=bool) \
+                             for i in range(n_chunks)]
+        self._types[name] = set()
+
+    def _promote_column(self, name, value):
+        chunks = self._data[name]
+        value = np.asarray(value)
+        if value.ndim == 0 and value.dtype.kind in 'biuf':
+            dtype = np.result_type(chunks[0].dtype, value.dtype)
+        else:
+            dtype = np.dtype(object)
+        log.debug('Promoting history column %s to %s', name, dtype)
+        self._data[name] = [c.astype(dtype) for c in chunks]
+        self._types[name] = set()
+
+    def _can_store(self, chunk, value):
+        if chunk.dtype.kind == 'O':
+            return True
+        value = np.asarray(value)
+        return value.ndim == 0 and np.can_cast(value.dtype, chunk.dtype, 'safe')
+
+    def append(self, values):
+        '''
+        Append values for a trial
+        '''
+        chunk, i = divmod(self.n_trials, self.chunk_size)
+        if i == 0:
+            for name, chunks in self._data.items():
+                chunks.append(self._new_chunk(chunks[0].dtype))
+                self._valid[name].append(np.zeros(self.chunk_size, dtype=bool))
+
+        for name, value in values.items():
+            if name not in self._data:
+                self._add_column(name, value)
+            value_type = type(value)
+            if value_type not in self._types[name]:
+                if not self._can_store(self._data[name][chunk], value):
+                    self._promote_column(name, value)
+                # Numpy arrays may have any dtype, so always check them.
+                if value_type is not np.ndarray:
+                    self._types[name].add(value_type)
+            self._data[name][chunk][i] = value
+            self._valid[name][chunk][i] = True
+
+        self.n_trials += 1
+
+    def _get_index(self, trial):
+        if trial < 0:
+            trial += self.n_trials
+        if not (0 <= trial < self.n_trials):
+            raise IndexError('Trial index out of range')
+        return divmod(trial, self.chunk_size)
+
+    def _get_scalar(self, name, chunk, i):
+        data = self._data[name][chunk]
+        return data[i] if data.dtype.kind == 'O' else data[i].item()
+
+    def get_value(self, name, trial=-1):
+        '''
+        Return value of context item on trial
+
+        Raises an IndexError if there is no such trial and a KeyError if the
+        value was not saved for the trial.
+        '''
+        chunk, i = self._get_index(trial)
+        if name not in self._data or not self._valid[name][chunk][i]:
+            raise KeyError(name)
+        return self._get_scalar(name, chunk, i)
+
+    def get_values(self, trial=-1):
+        '''
+        Return dictionary of all values saved for trial
+        '''
+        chunk, i = self._get_index(trial)
+        return {n: self._get_scalar(n, chunk, i) for n in self._data \
+                if self._valid[n][chunk][i]}
+
+    def get_column(self, name):
+        '''
+        Return array containing the value of context item for all trials
+
+        Trials where the value was not saved are NaN (for float columns) or
+        None (for object columns).
+        '''
+        data = np.concatenate(self._data[name])
+        return data[:self.n_trials]
+
+    def get_valid(self, name):
+        '''
+        Return boolean array indicating trials where the value was saved
+        '''
+        valid = np.concatenate(self._valid[name])
+        return valid[:self.n_trials]
+
+    def to_dataframe(self):
+        '''
+        Return trial history as a DataFrame with one row per trial
+        '''
+        data = {}
+        for name in self._data:
+            column = self.get_column(name)
+            valid = self.get_valid(name)
+            if not valid.all() and column.dtype.kind in 'biu':
+                column = pd.Series(column).where(valid)
+            data[name] = column
+        return pd.DataFrame(data, index=pd.RangeIndex(self.n_trials))
@@ -5,6 +5,7 @@ import pickle as pickle
 from copy import deepcopy
 
 import numpy as np
+import pandas as pd
 
 from atom.api import Typed, Bool, Str, observe, Property
 from enaml.application import deferred_call
@@ -18,6 +19,7 @@ from .context_item import (
 )
 
 from .expression import ExpressionNamespace
+from .history import TrialHistory
 from .selector import BaseSelector
 from .symbol import Symbol
 
@@ -26,8 +28,22 @@ SYMBOLS_POINT = 'psi.context.symbols'
 ITEMS_POINT = 'psi.context.items'
 
 
+def copy_state(state):
+    '''
+    Deep copy of state
+
+    Preferences are typically plain data, for which a pickle round-trip is
+    much faster than `deepcopy`. Fall back to `deepcopy` for anything that
+    cannot be pickled.
+    '''
+    try:
+        return pickle.loads(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return deepcopy(state)
+
+
 def get_preferences(obj):
-    return deepcopy(get_tagged_values(obj, 'preference'))
+    return copy_state(get_tagged_values(obj, 'preference'))
 
 
 class ContextLookup:
@@ -67,6 +83,12 @@ class ContextPlugin(Plugin):
 
     _selectors = Typed(dict, ())
 
+    # Names of context items and selectors that may have been modified since
+    # changes were last applied or reverted. Only these need to be checked,
+    # saved or restored.
+    _dirty_items = Typed(set, ())
+    _dirty_selectors = Typed(set, ())
+
     changes_pending = Bool(False)
 
     # Used to track whether context has properly been initialized. Since all
@@ -76,7 +98,10 @@ class ContextPlugin(Plugin):
 
     _iterators = Typed(dict, ())
     _namespace = Typed(ExpressionNamespace, ())
-    _prior_values = Typed(list, ())
+
+    # Values used on prior trials. Observe `_history.n_trials` to be notified
+    # when a trial is added.
+    _history = Typed(TrialHistory, ())
 
     # Subset of context_items that are parameters
     parameters = Property()
@@ -224,6 +249,8 @@ class ContextPlugin(Plugin):
             i.observe('rove', self._observe_item_rove)
             if getattr(i, 'rove', False):
                 self.rove_item(i)
+        self._dirty_items.update(oldvalue.keys() ^ newvalue.keys())
+        self._dirty_items.update(newvalue.keys() - self._context_item_state.keys())
 
     @observe('symbols')
     def _update_selectors(self, event):
@@ -231,9 +258,11 @@ class ContextPlugin(Plugin):
             selector.symbols = self.symbols[:]
 
     def _observe_item_updated(self, event):
+        self._dirty_items.add(event['object'].name)
         self._check_for_changes()
 
     def _observe_item_rove(self, event):
+        self._dirty_items.add(event['object'].name)
         if event['value']:
             log.debug('Roving {}'.format(event['object'].name))
             self.rove_item(event['object'])
@@ -243,12 +272,20 @@ class ContextPlugin(Plugin):
 
     @observe('selectors')
     def _bind_selectors(self, change):
-        for p in change.get('oldvalue', {}).values():
+        oldvalue = change.get('oldvalue', {})
+        newvalue = change.get('value', {})
+        for p in oldvalue.values():
             p.unobserve('updated', self._observe_selector_updated)
-        for p in change.get('value', {}).values():
+        for p in newvalue.values():
             p.observe('updated', self._observe_selector_updated)
+        self._dirty_selectors.update(oldvalue.keys() ^ newvalue.keys())
+        self._dirty_selectors.update(newvalue.keys() - self._selector_state.keys())
 
     def _observe_selector_updated(self, event):
+        # Comparing the full state of a selector (which may have thousands of
+        # settings) on every edit is expensive, so any update marks the
+        # selector as modified.
+        self._dirty_selectors.add(event['object'].name)
         self._check_for_changes()
 
     def _get_iterators(self, cycles=np.inf):
@@ -268,6 +305,53 @@ class ContextPlugin(Plugin):
         else:
             yield namespace.get_values()
 
+    def get_settings_table(self, iterator='default', cycles=1):
+        '''
+        Return all settings of the selector as a table
+
+        Unlike `iter_settings`, expressions that do not depend on the roved
+        parameters are evaluated only once and shared by all settings. Only
+        the roved parameters and the expressions that depend on them are
+        evaluated for each setting. Note that this means expressions that do
+        not depend on roved parameters but return a different value each time
+        they are evaluated (e.g., a random draw) have the same value in every
+        row.
+
+        Parameters
+        ----------
+        iterator : str
+            Name of selector to iterate through.
+        cycles : int
+            Number of cycles through the selector.
+
+        Returns
+        -------
+        settings : DataFrame
+            One row per setting (in the order generated by the selector) and
+            one column per context item.
+        '''
+        log.debug('Building settings table for %s iterator', iterator)
+        namespace = ExpressionNamespace(self.expressions, self.symbols)
+        if not iterator:
+            return pd.DataFrame([namespace.get_values()])
+
+        selector = self.selectors[iterator]
+        roved = [i.name for i in selector.context_items]
+        dependents = namespace.get_dependents(roved)
+        constant_names = [n for n in self.expressions if n not in dependents]
+        constants = namespace.get_values(constant_names)
+
+        rows = []
+        for setting in selector.get_iterator(cycles=cycles):
+            expressions = {i.name: i.to_expression(e) for i, e in setting.items()}
+            namespace.update_expressions(expressions)
+            namespace.reset()
+            namespace.set_values(constants)
+            rows.append(namespace.get_values())
+
+        columns = list(dict.fromkeys(list(self.expressions) + roved))
+        return pd.DataFrame(rows, columns=columns)
+
     def unique_values(self, item_name, iterator='default'):
         iterable = self.iter_settings(iterator, 1)
         items = [c[item_name] for c in iterable]
@@ -324,9 +408,7 @@ class ContextPlugin(Plugin):
         '''
         log.debug('Loading next setting')
         if save_prior:
-            prior_values = self._prior_values[:]
-            prior_values.append(self.get_values())
-            self._prior_values = prior_values
+            self._history.append(self.get_values())
         self._namespace.reset()
 
         if selector is None:
@@ -346,7 +428,7 @@ class ContextPlugin(Plugin):
             raise ValueError(context_initialized_error)
         if trial is not None:
             try:
-                return self._prior_values[trial][context_name]
+                return self._history.get_value(context_name, trial)
             except IndexError:
                 return None
         try:
@@ -359,9 +441,15 @@ class ContextPlugin(Plugin):
         if not self.initialized:
             raise ValueError(context_initialized_error)
         if trial is not None:
-            return self._prior_values[trial]
+            return self._history.get_values(trial)
         return self._namespace.get_values(names=context_names)
 
+    def get_history(self):
+        '''
+        Return values used on all prior trials as a DataFrame
+        '''
+        return self._history.to_dataframe()
+
     def set_value(self, context_name, value):
         self._namespace.set_value(context_name, value)
 
@@ -375,22 +463,21 @@ class ContextPlugin(Plugin):
 
     def _check_for_changes(self):
         log.debug('Checking for changes')
-        for name, state in self._context_item_state.items():
-            if name not in self.context_items:
-                log.debug('%s not in context item state. changes pending.', name)
-                self.changes_pending = True
-                return
-            item = self.context_items[name]
-            if (item.rove, item.expression) != state:
-                log.debug('%s expression/rove does not match state. changes pending.', name)
-                self.changes_pending = True
-                return
-
-        self.changes_pending = self.selectors != self._selectors
+        # Items that have been modified and then changed back to the applied
+        # state are no longer considered modified.
+        for name in list(self._dirty_items):
+            item = self.context_items.get(name, None)
+            state = self._context_item_state.get(name, None)
+            if item is not None and state is not None and \
+                    get_tagged_values(item, 'preference') == state:
+                self._dirty_items.discard(name)
+
+        self.changes_pending = bool(self._dirty_items or self._dirty_selectors)
         if self.changes_pending:
-            log.debug('Selectors do not match. Changes pending.')
+            log.debug('Changes pending for %r', self._dirty_items | self._dirty_selectors)
 
     def apply_changes(self, cycles=np.inf):
+        self._history.dtypes = {n: i.dtype for n, i in self.context_items.items()}
         self._apply_context_item_state()
         self._apply_selector_state()
         self._namespace.update_expressions(self.expressions)
@@ -416,21 +503,38 @@ class ContextPlugin(Plugin):
         e.update({n.parameter: n.expression for n in self.context_expressions})
         return e
 
+    def _apply_state(self, objects, state, dirty):
+        # Save state of objects that were modified, added or removed.
+        for name in dirty | (objects.keys() ^ state.keys()):
+            if name in objects:
+                state[name] = get_preferences(objects[name])
+            else:
+                state.pop(name, None)
+        dirty.clear()
+
+    def _revert_state(self, objects, state, dirty):
+        # Restoring the state may trigger notifications that mark the objects
+        # as modified again, so clear the set once everything is restored.
+        for name in list(dirty):
+            if name in objects and name in state:
+                objects[name].__setstate__(copy_state(state[name]))
+        dirty.clear()
+
     def _apply_selector_state(self):
-        state = {n: get_preferences(s) for n, s in self.selectors.items()}
-        self._selector_state = state
+        self._apply_state(self.selectors, self._selector_state,
+                          self._dirty_selectors)
 
     def _revert_selector_state(self):
-        for name, state in self._selector_state.items():
-            self.selectors[name].__setstate__(deepcopy(state))
+        self._revert_state(self.selectors, self._selector_state,
+                           self._dirty_selectors)
 
     def _apply_context_item_state(self):
-        state = {n: get_preferences(i) for n, i in self.context_items.items()}
-        self._context_item_state = state
+        self._apply_state(self.context_items, self._context_item_state,
+                          self._dirty_items)
 
     def _revert_context_item_state(self):
-        for name, state in self._context_item_state.items():
-            self.context_items[name].__setstate__(deepcopy(state))
+        self._revert_state(self.context_items, self._context_item_state,
+                           self._dirty_items)
 
     @property
     def has_selectors(self):
@@ -288,15 +288,37 @@ class CartesianProduct(BaseSelector):
 
     def add_setting(self, item, value):
         self.settings[item.name].append(value)
+        self.updated = True
 
-    def get_settings(self):
+    def get_sequence(self, seed=None):
+        '''
+        Return all settings in a single cycle as a lazy sequence
+
+        Settings are computed from the index when requested, so the length and
+        any individual setting can be obtained without generating the full
+        product.
+
+        Parameters
+        ----------
+        seed : {None, int}
+            If provided, return the settings in a pseudorandom order generated
+            using the seed.
+        '''
         values = [self.settings[i.name] for i in self.context_items]
-        return [dict(zip(self.context_items, s)) for s in itertools.product(*values)]
+        sequence = choice.Product(values, keys=self.context_items)
+        if seed is not None:
+            sequence = choice.Permuted(sequence, seed)
+        return sequence
+
+    def setting_at(self, index, seed=None):
+        return self.get_sequence(seed)[index]
+
+    def get_settings(self):
+        return list(self.get_sequence())
 
     @warn_empty
     def get_iterator(self, cycles=np.inf):
-        settings = self.get_settings()
-        return choice.exact_order(settings, cycles)
+        return choice.exact_order(self.get_sequence(), cycles)
 
 
 class SequenceSelector(BaseSelector):
@@ -307,6 +329,16 @@ class SequenceSelector(BaseSelector):
     settings = Typed(list, []).tag(preference=True)
     order = d_(Enum(*choice.options.keys())).tag(preference=True)
 
+    # Index of settings in the order returned by `get_sequence`. Cleared
+    # whenever the selector is updated.
+    _order_index = Typed(list)
+
+    def _observe_updated(self, event):
+        self._order_index = None
+
+    def _observe_settings(self, event):
+        self._order_index = None
+
     def add_setting(self, values=None, index=None):
         if values is None:
             values = {}
@@ -366,6 +398,31 @@ class SequenceSelector(BaseSelector):
     def _observe_order(self, event):
         self.updated = True
 
+    def get_sequence(self):
+        '''
+        Return the settings in a single cycle
+
+        For the ascending and descending orders the settings are sorted (the
+        sort order is cached until the selector is updated). Otherwise, the
+        settings are returned in the order they were specified since the
+        remaining orders are randomized on each cycle.
+        '''
+        if self._order_index is None:
+            index = list(range(len(self.settings)))
+            if self.order in ('ascending', 'descending'):
+                reverse = self.order == 'descending'
+                index.sort(key=lambda i: self.get_key(self.settings[i]),
+                           reverse=reverse)
+            self._order_index = index
+        return [{i: self.settings[j][i.name] for i in self.context_items} \
+                for j in self._order_index]
+
+    def setting_at(self, index):
+        if self._order_index is None:
+            self.get_sequence()
+        setting = self.settings[self._order_index[index]]
+        return {i: setting[i.name] for i in self.context_items}
+
     @warn_empty
     def get_iterator(self, cycles=np.inf):
         # Some selectors need to sort the settings. To make sure that the
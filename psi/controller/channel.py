@@ -71,6 +71,13 @@ class Channel(PSIContribution):
     def _get_active(self):
         raise NotImplementedError
 
+    def notify_active_changed(self):
+        '''
+        Notify the engine that the active state of the channel may have changed
+        '''
+        if self.engine is not None:
+            self.engine.invalidate_channels()
+
     def __str__(self):
         return self.label
 
@@ -97,21 +104,23 @@ class InputMixin(Declarative):
             return
         self.inputs.append(i)
         i.source = self
+        self.notify_active_changed()
 
     def remove_input(self, i):
         if i not in self.inputs:
             return
         self.inputs.remove(i)
         i.source = None
+        self.notify_active_changed()
 
     def configure(self):
         for input in self.inputs:
             log.debug('Configuring input {}'.format(input.name))
             input.configure()
 
-    def add_callback(self, cb):
+    def add_callback(self, cb, chunks=False):
         from .input import Callback
-        callback = Callback(function=cb)
+        callback = Callback(function=cb, chunks=chunks)
         self.add_input(callback)
 
 
@@ -145,12 +154,14 @@ class OutputMixin(Declarative):
             return
         self.outputs.append(o)
         o.target = self
+        self.notify_active_changed()
 
     def remove_output(self, o):
         if o not in self.outputs:
             return
         self.outputs.remove(o)
         o.target = None
+        self.notify_active_changed()
 
     def add_queued_epoch_output(self, queue, auto_decrement=True):
         # Subclasses of Enaml Declarative will automatically insert themselves
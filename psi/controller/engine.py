@@ -84,9 +84,41 @@ class Engine(PSIContribution):
 
     hw_ao_monitor_period = d_(Float(1)).tag(metadata=True)
 
+    #: Cache of channels returned by `get_channels` keyed by the arguments
+    #: passed to the method. This is called in hot paths (e.g., the analog
+    #: output callback), so we avoid rebuilding the list on every call.
+    _channel_cache = Typed(dict, ())
+
     def _default_lock(self):
         return threading.Lock()
 
+    def child_added(self, child):
+        super().child_added(child)
+        if isinstance(child, Channel):
+            self.invalidate_channels()
+
+    def child_moved(self, child):
+        super().child_moved(child)
+        if isinstance(child, Channel):
+            self.invalidate_channels()
+
+    def child_removed(self, child):
+        super().child_removed(child)
+        if isinstance(child, Channel):
+            self.invalidate_channels()
+
+    def invalidate_channels(self):
+        '''
+        Clear the cached results of `get_channels`
+
+        This is called automatically when channels are added or removed from
+        the engine and when the inputs or outputs connected to a channel
+        change.
+        '''
+        # Replace rather than clear the cache so that a lookup running in
+        # another thread cannot store a stale result in the new cache.
+        self._channel_cache = {}
+
     def get_channels(self, mode=None, direction=None, timing=None,
                      active=True):
         '''
@@ -105,6 +137,16 @@ class Engine(PSIContribution):
             If True, return only channels that have configured inputs or
             outputs.
         '''
+        cache = self._channel_cache
+        key = mode, direction, timing, active
+        try:
+            return cache[key]
+        except KeyError:
+            channels = self._get_channels(mode, direction, timing, active)
+            cache[key] = channels
+            return channels
+
+    def _get_channels(self, mode, direction, timing, active):
         channels = [c for c in self.children if isinstance(c, Channel)]
 
         if active:
@@ -32,12 +32,13 @@ from atom.api import (Float, Typed, Unicode, Int, Bool, Callable, Enum,
                       Property, Value)
 from enaml.core.api import Declarative, d_
 
+from psi.util import BufferPool
 from ..calibration.util import dbi
 from ..engine import Engine
 from ..channel import (CounterChannel,
                        HardwareAIChannel, HardwareAOChannel, HardwareDIChannel,
                        HardwareDOChannel, SoftwareDIChannel, SoftwareDOChannel)
-from ..input import InputData
+from ..input import Chunk
 
 
 ################################################################################
@@ -178,7 +179,8 @@ def read_digital_lines(task, size=1):
     return data.T
 
 
-def read_hw_ai(task, available_samples=None, channels=1, block_size=1):
+def read_hw_ai(task, available_samples=None, channels=1, block_size=1,
+               pool=None):
     if available_samples is None:
         uint32 = ctypes.c_uint32()
         mx.DAQmxGetReadAvailSampPerChan(task, uint32)
@@ -188,7 +190,10 @@ def read_hw_ai(task, available_samples=None, channels=1, block_size=1):
     if blocks == 0:
         return
     samples = blocks*block_size
-    data = np.empty((channels, samples), dtype=np.double)
+    if pool is None:
+        data = np.empty((channels, samples), dtype=np.double)
+    else:
+        data = pool.get((channels, samples))
     int32 = ctypes.c_int32()
     mx.DAQmxReadAnalogF64(task, samples, 0, mx.DAQmx_Val_GroupByChannel, data,
                           data.size, int32, None)
@@ -237,7 +242,7 @@ def hw_ao_helper(cb, task, event_type, cb_samples, cb_data):
 
 
 def hw_ai_helper(cb, channels, discard, task, event_type=None, cb_samples=None,
-                 cb_data=None):
+                 cb_data=None, pool=None, fs=None):
     uint32 = ctypes.c_uint32()
     mx.DAQmxGetReadAvailSampPerChan(task, uint32)
     available_samples = uint32.value
@@ -253,17 +258,20 @@ def hw_ai_helper(cb, channels, discard, task, event_type=None, cb_samples=None,
 
     if read_position < discard:
         samples = min(discard-read_position, available_samples)
-        read_hw_ai(task, samples, channels)
+        read_hw_ai(task, samples, channels, pool=pool)
         available_samples -= samples
+        read_position += samples
         log_ai.debug('Discarded %d samples from beginning, %d available',
                      samples, available_samples)
 
     if available_samples == 0:
         return 0
 
-    data = read_hw_ai(task, available_samples, channels, cb_samples)
+    data = read_hw_ai(task, available_samples, channels, cb_samples, pool)
     if data is not None:
-        data = InputData(data)
+        # Sample indices are relative to the first sample after the discarded
+        # samples.
+        data = Chunk(data, read_position-discard, fs)
         cb(data)
     return 0
 
@@ -565,7 +573,11 @@ def setup_hw_ai(channels, callback_duration, callback, task_name='hw_ao'):
         # Not a supported property. Set filter delay to 0 by default.
         filter_delay = 0
 
-    task._cb = partial(hw_ai_helper, callback, n_channels, filter_delay)
+    # Reuse the read buffers once the callbacks are done with them. This
+    # avoids allocating a new array every time data is acquired.
+    task._pool = BufferPool(np.double)
+    task._cb = partial(hw_ai_helper, callback, n_channels, filter_delay,
+                       pool=task._pool, fs=fs)
     task._cb_ptr = mx.DAQmxEveryNSamplesEventCallbackPtr(task._cb)
     mx.DAQmxRegisterEveryNSamplesEvent(
         task, mx.DAQmx_Val_Acquired_Into_Buffer, int(callback_samples), 0,
@@ -1088,7 +1100,7 @@ class NIDAQEngine(Engine):
                 cb(change, event_time)
 
     def _hw_ai_callback(self, samples):
-        samples /= self._tasks['hw_ai']._sf
+        samples.data /= self._tasks['hw_ai']._sf
         for channel_name, s, cb in self._callbacks.get('ai', []):
             try:
                 cb(samples[s])
@@ -48,6 +48,38 @@ def simple_match(key, context):
         raise new_exc from e
 
 
+match_template = '''
+def match(context):
+{lookups}
+    return {expression}
+'''
+
+
+def compiled_match(function, context):
+    try:
+        return function(context)
+    except KeyError as e:
+        new_exc = KeyError(missing_event_mesg.format(key=e.args[0]))
+        raise new_exc from e
+
+
+def compile_match(expression, dependencies):
+    '''
+    Compile expression into a function that evaluates it against a context
+
+    Each name in the expression is bound to a local variable from the context
+    dictionary. Unlike `eval`, this does not need to copy the context into a
+    globals dictionary on each call.
+    '''
+    names = sorted(set(d.split('.', 1)[0] for d in dependencies))
+    lookups = [f'    {n} = context[{n!r}]' for n in names]
+    source = match_template.format(lookups='\n'.join(lookups),
+                                   expression=expression.strip())
+    namespace = {}
+    exec(compile(source, 'dynamic', 'exec'), namespace)
+    return partial(compiled_match, namespace['match'])
+
+
 class ExperimentActionBase(Declarative):
 
     # Name of event that triggers command
@@ -69,11 +101,10 @@ class ExperimentActionBase(Declarative):
         return get_dependencies(self.event)
 
     def _default_match(self):
-        code = compile(self.event, 'dynamic', 'eval')
-        if len(self.dependencies) == 1:
+        if self.dependencies == [self.event.strip()]:
             return partial(simple_match, self.dependencies[0])
         else:
-            return partial(eval, code)
+            return compile_match(self.event, self.dependencies)
 
     def __str__(self):
         return f'{self.event} (weight={self.weight}; kwargs={self.kwargs})'
@@ -24,6 +24,13 @@ from psi.controller.calibration.api import FlatCalibration
 
 
 class InputData(np.ndarray):
+    '''
+    Array that carries a metadata dictionary
+
+    This is retained for compatibility with callbacks and custom inputs that
+    expect an ndarray. Inputs now pass data to each other using `Chunk`, which
+    avoids the overhead of propagating metadata on every array operation.
+    '''
 
     def __new__(cls, input_array, metadata=None):
         obj = np.asarray(input_array).view(cls)
@@ -35,16 +42,140 @@ class InputData(np.ndarray):
         self.metadata = getattr(obj, 'metadata', None)
 
 
+class Chunk:
+    '''
+    Block of samples acquired from a continuous input
+
+    Parameters
+    ----------
+    data : ndarray
+        Samples. The last axis is time.
+    s0 : int
+        Index of the first sample in `data` relative to the start of
+        acquisition.
+    fs : float
+        Sampling rate of the data.
+    metadata : dict
+        Information about the data. Treat as immutable (i.e., create a new
+        dictionary rather than modifying it) since the dictionary is shared
+        with the chunks it was derived from.
+
+    Notes
+    -----
+    Indexing a chunk returns a new chunk. If the index includes a slice along
+    the time axis, `s0` is adjusted so that it continues to point to the first
+    sample in the new chunk.
+    '''
+    __slots__ = ('data', 's0', 'fs', 'metadata')
+
+    def __init__(self, data, s0=0, fs=None, metadata=None):
+        self.data = data
+        self.s0 = s0
+        self.fs = fs
+        self.metadata = {} if metadata is None else metadata
+
+    def __repr__(self):
+        return f'<Chunk {self.data.shape} at sample {self.s0}>'
+
+    def __len__(self):
+        return len(self.data)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.data, dtype=dtype)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def ndim(self):
+        return self.data.ndim
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def t0(self):
+        '''
+        Time of the first sample in the chunk
+        '''
+        return self.s0 / self.fs
+
+    def with_data(self, data, s0=None, fs=None):
+        '''
+        Return a new chunk containing `data` with the same metadata
+        '''
+        if s0 is None:
+            s0 = self.s0
+        if fs is None:
+            fs = self.fs
+        return Chunk(data, s0, fs, self.metadata)
+
+    def _time_offset(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if any(k is Ellipsis for k in key):
+            time_key = key[-1]
+        else:
+            # If fewer indices than dimensions are provided, the time axis is
+            # not indexed.
+            indices = [k for k in key if k is not None]
+            if len(indices) < self.data.ndim:
+                return 0
+            time_key = indices[-1]
+        if time_key is None or time_key is Ellipsis:
+            return 0
+        if isinstance(time_key, slice) and time_key.step in (None, 1):
+            return time_key.indices(self.data.shape[-1])[0]
+        raise IndexError('Time axis of a Chunk can only be indexed by a '
+                         'contiguous slice. Use chunk.data instead.')
+
+    def __getitem__(self, key):
+        return Chunk(self.data[key], self.s0 + self._time_offset(key),
+                     self.fs, self.metadata)
+
+
 def concatenate(input_data, axis=None):
     b = input_data[0]
     for d in input_data[1:]:
-        if d.metadata != b.metadata:
+        if d.metadata is not b.metadata and d.metadata != b.metadata:
             log.debug('%r vs %r', d.metadata, b.metadata)
             raise ValueError('Cannot combine InputData set')
+    if isinstance(b, Chunk):
+        arrays = np.concatenate([d.data for d in input_data], axis=axis)
+        return b.with_data(arrays)
     arrays = np.concatenate(input_data, axis=axis)
     return InputData(arrays, b.metadata)
 
 
+@coroutine
+def as_chunks(source, target):
+    '''
+    Wrap data from sources that do not provide chunks in a Chunk
+    '''
+    s0 = 0
+    while True:
+        data = (yield)
+        if isinstance(data, np.ndarray):
+            metadata = getattr(data, 'metadata', None)
+            data = Chunk(np.asarray(data), s0, source.fs, metadata)
+            s0 += data.shape[-1]
+        target(data)
+
+
+@coroutine
+def as_input_data(target):
+    '''
+    Convert chunks to InputData for inputs that do not support chunks
+    '''
+    while True:
+        data = (yield)
+        if isinstance(data, Chunk):
+            data = InputData(data.data, data.metadata)
+        target(data)
+
+
 @coroutine
 def broadcast(*targets):
     while True:
@@ -72,6 +203,11 @@ class Input(PSIContribution):
 
     inputs = List()
 
+    #: Does this input accept data as `Chunk`? Inputs that expect an ndarray
+    #: (e.g., custom inputs written before chunks were introduced) should set
+    #: this to False. They will then receive `InputData` instead.
+    chunks = d_(Bool(True))
+
     def _default_name(self):
         if self.source is not None:
             base_name = self.source.name
@@ -87,12 +223,23 @@ class Input(PSIContribution):
             return
         self.inputs.append(i)
         i.source = self
+        self.notify_active_changed()
 
     def remove_input(self, i):
         if i not in self.inputs:
             return
         self.inputs.remove(i)
         i.source = None
+        self.notify_active_changed()
+
+    def notify_active_changed(self):
+        # Propagate up to the channel so that the engine knows the set of
+        # active channels may have changed.
+        if self.source is not None:
+            self.source.notify_active_changed()
+
+    def _observe_force_active(self, event):
+        self.notify_active_changed()
 
     def _get_fs(self):
         return self.source.fs
@@ -118,19 +265,34 @@ class Input(PSIContribution):
         return self.channel.engine
 
     def configure(self):
+        # The engine may provide either arrays or chunks.
         cb = self.configure_callback()
+        if self.chunks:
+            cb = as_chunks(self.source, cb).send
+        else:
+            cb = as_input_data(cb).send
         self.engine.register_ai_callback(cb, self.channel.name)
 
+    def _get_target(self, source_chunks):
+        # Convert between arrays and chunks if this input does not accept the
+        # format provided by the source.
+        cb = self.configure_callback()
+        if self.chunks and not source_chunks:
+            return as_chunks(self.source, cb).send
+        if not self.chunks and source_chunks:
+            return as_input_data(cb).send
+        return cb
+
     def configure_callback(self):
-        targets = [i.configure_callback() for i in self.inputs if i.active]
+        targets = [i._get_target(self.chunks) for i in self.inputs if i.active]
         log.debug('Configured callback for %s with %d targets', self.name, len(targets))
         if len(targets) == 1:
             return targets[0]
         # If we have more than one target, need to add a broadcaster
         return broadcast(*targets).send
 
-    def add_callback(self, cb):
-        callback = Callback(function=cb)
+    def add_callback(self, cb, chunks=False):
+        callback = Callback(function=cb, chunks=chunks)
         self.add_input(callback)
 
     def _get_active(self):
@@ -156,6 +318,7 @@ class EpochInput(Input):
 class Callback(Input):
 
     function = d_(Callable())
+    chunks = d_(Bool(False))
 
     def configure_callback(self):
         log.debug('Configuring callback for {}'.format(self.name))
@@ -178,6 +341,7 @@ def custom_input(function, target):
 class CustomInput(Input):
 
     function = d_(Callable())
+    chunks = d_(Bool(False))
 
     def configure_callback(self):
         cb = super().configure_callback()
@@ -189,7 +353,7 @@ def calibrate(calibration, target):
     sens = dbi(calibration.get_sens(1000))
     while True:
         data = (yield)
-        target(data/sens)
+        target(data.with_data(data.data/sens))
 
 
 class CalibratedInput(ContinuousInput):
@@ -209,10 +373,12 @@ def rms(n, target):
         if data is None:
             data = (yield)
         else:
-            data = np.concatenate((data, (yield)), axis=-1)
+            new_data = (yield)
+            merged = np.concatenate((data.data, new_data.data), axis=-1)
+            data = data.with_data(merged)
         while data.shape[-1] >= n:
-            result = np.mean(data[..., :n]**2, axis=0)**0.5
-            target(result[np.newaxis])
+            result = np.mean(data.data[..., :n]**2, axis=0)**0.5
+            target(data.with_data(result[np.newaxis], data.s0//n, data.fs/n))
             data = data[..., n:]
 
 
@@ -235,9 +401,8 @@ def spl(target, sens):
     v_to_pa = dbi(sens)
     while True:
         data = (yield)
-        data /= v_to_pa
-        spl = patodb(data)
-        target(spl)
+        spl = patodb(data.data/v_to_pa)
+        target(data.with_data(spl))
 
 
 class SPL(ContinuousInput):
@@ -258,11 +423,11 @@ def iirfilter(N, Wn, rp, rs, btype, ftype, target):
     # transient.
     zi = signal.lfilter_zi(b, a)
     y = (yield)
-    zo = zi*y[0]
+    zo = zi*y.data[0]
 
     while True:
-        y, zo = signal.lfilter(b, a, y, zi=zo)
-        target(y)
+        y_filtered, zo = signal.lfilter(b, a, y.data, zi=zo)
+        target(y.with_data(y_filtered))
         y = (yield)
 
 
@@ -381,10 +546,8 @@ class Accumulate(ContinuousInput):
 
 @coroutine
 def capture(fs, queue, target):
-    s0 = 0
     t_start = None  # Time, in seconds, of capture start
-    s_next = None   # Sample number fo rcapture
-    active = False
+    s_next = None   # Sample number for capture
 
     while True:
         # Wait for new data to come in
@@ -407,16 +570,14 @@ def capture(fs, queue, target):
         except Empty:
             pass
 
-        if (s_next is not None) and (s_next >= s0):
-            i = s_next-s0
+        if (s_next is not None) and (s_next >= data.s0):
+            i = s_next-data.s0
             if i < data.shape[-1]:
-                d = data[i:]
-                d.metadata['capture'] = t_start
+                d = data[..., i:]
+                d.metadata = dict(d.metadata, capture=t_start)
                 target(d)
                 s_next += d.shape[-1]
 
-        s0 += data.shape[-1]
-
 
 class Capture(ContinuousInput):
 
@@ -432,7 +593,9 @@ class Capture(ContinuousInput):
 def downsample(q, target):
     y_remainder = np.array([])
     while True:
-        y = np.r_[y_remainder, (yield)]
+        data = (yield)
+        s0 = data.s0 - len(y_remainder)
+        y = np.r_[y_remainder, data.data]
         remainder = len(y) % q
         if remainder != 0:
             y, y_remainder = y[:-remainder], y[-remainder:]
@@ -440,7 +603,7 @@ def downsample(q, target):
             y_remainder = np.array([])
         result = y[::q]
         if len(result):
-            target(result)
+            target(data.with_data(result, s0//q, data.fs/q))
 
 
 class Downsample(ContinuousInput):
@@ -463,7 +626,9 @@ def decimate(q, target):
     zf = signal.lfilter_zi(b, a)
     y_remainder = np.array([])
     while True:
-        y = np.r_[y_remainder, (yield)]
+        data = (yield)
+        s0 = data.s0 - len(y_remainder)
+        y = np.r_[y_remainder, data.data]
         remainder = len(y) % q
         if remainder != 0:
             y, y_remainder = y[:-remainder], y[-remainder:]
@@ -472,7 +637,7 @@ def decimate(q, target):
         y, zf = signal.lfilter(b, a, y, zi=zf)
         result = y[::q]
         if len(result):
-            target(result)
+            target(data.with_data(result, s0//q, data.fs/q))
 
 
 class Decimate(ContinuousInput):
@@ -489,22 +654,23 @@ class Decimate(ContinuousInput):
 
 @coroutine
 def discard(discard_samples, cb):
-    discarded = discard_samples
+    to_discard = discard_samples
     while True:
         samples = (yield)
         if samples is Ellipsis:
-            to_discard = discarded
+            # A new segment (e.g., from `Capture`) is starting. Discard the
+            # beginning of the new segment.
+            to_discard = discard_samples
             cb(samples)
             continue
 
-        if discard_samples == 0:
+        if to_discard == 0:
             cb(samples)
-        elif samples.shape[-1] <= discard_samples:
-            discard_samples -= samples.shape[-1]
-        elif samples.shape[-1] > discard_samples:
-            s = samples[..., discard_samples:]
-            discard_samples -= s.shape[-1]
-            cb(s)
+        elif samples.shape[-1] <= to_discard:
+            to_discard -= samples.shape[-1]
+        else:
+            cb(samples[..., to_discard:])
+            to_discard = 0
 
 
 class Discard(ContinuousInput):
@@ -521,7 +687,7 @@ class Discard(ContinuousInput):
 def threshold(threshold, target):
     while True:
         samples = (yield)
-        target(samples >= threshold)
+        target(samples.with_data(samples.data >= threshold))
 
 
 class Threshold(ContinuousInput):
@@ -559,9 +725,10 @@ class Average(ContinuousInput):
 
 @coroutine
 def delay(n, target):
-    data = np.full(n, np.nan)
+    data = (yield)
+    target(data.with_data(np.full(n, np.nan)))
     while True:
-        target(data)
+        target(data.with_data(data.data, data.s0+n))
         data = (yield)
 
 
@@ -583,8 +750,8 @@ class Delay(ContinuousInput):
 def transform(function, target):
     while True:
         data = (yield)
-        transformed_data = function(data)
-        target(transformed_data)
+        transformed_data = function(data.data)
+        target(data.with_data(transformed_data))
 
 
 class Transform(ContinuousInput):
@@ -604,11 +771,11 @@ def edges(initial_state, min_samples, fs, target):
     if min_samples < 1:
         raise ValueError('min_samples must be greater than 1')
     prior_samples = np.tile(initial_state, min_samples)
-    t_prior = -min_samples
     while True:
         # Wait for new data to become available
         new_samples = (yield)
-        samples = np.r_[prior_samples, new_samples]
+        t_prior = new_samples.s0 - min_samples
+        samples = np.r_[prior_samples, new_samples.data]
         ts_change = np.flatnonzero(np.diff(samples, axis=-1)) + 1
         ts_change = np.r_[ts_change, samples.shape[-1]]
 
@@ -623,7 +790,6 @@ def edges(initial_state, min_samples, fs, target):
                 events.append((edge, ts/fs))
         if events:
             target(events)
-        t_prior += new_samples.shape[-1]
         prior_samples = samples[..., -min_samples:]
 
 
@@ -687,12 +853,6 @@ def capture_epoch(epoch_t0, epoch_samples, info, callback):
 def extract_epochs(fs, queue, epoch_size, poststim_time, buffer_size, target,
                    empty_queue_cb=None):
 
-    # The variable `tlb` tracks the number of samples that have been acquired
-    # and reflects the lower bound of `data`. For example, if we have acquired
-    # 300,000 samples, then the next chunk of data received from (yield) will
-    # start at sample 300,000 (remember that Python is zero-based indexing, so
-    # the first sample has an index of 0).
-    tlb = 0
     epoch_coroutines = []
     prior_samples = []
 
@@ -705,8 +865,13 @@ def extract_epochs(fs, queue, epoch_size, poststim_time, buffer_size, target,
     epochs = []
 
     while True:
-        # Wait for new data to become available
-        data = (yield)
+        # Wait for new data to become available. The variable `tlb` reflects
+        # the lower bound of `data`. For example, if we have acquired 300,000
+        # samples, then the next chunk of data received from (yield) will start
+        # at sample 300,000 (remember that Python is zero-based indexing, so
+        # the first sample has an index of 0).
+        chunk = (yield)
+        tlb, data = chunk.s0, chunk.data
         prior_samples.append((tlb, data))
 
         # Send the data to each coroutine. If a StopIteration occurs, this means
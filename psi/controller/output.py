@@ -14,6 +14,8 @@ from enaml.application import deferred_call
 from enaml.core.api import Declarative, d_
 from enaml.workbench.api import Extension
 
+from psi.token.bank import factory_id, render_waveforms, WaveformBank
+from psi.token.cache import content_key
 from ..util import coroutine, SignalBuffer
 from .queue import AbstractSignalQueue
 
@@ -212,6 +214,10 @@ class EpochOutput(BufferedOutput):
         return waveform
 
 
+#: Bank used by `QueuedEpochOutput.prerender`
+STIMULUS_BANK = WaveformBank('stimuli')
+
+
 class QueuedEpochOutput(BufferedOutput):
 
     queue = d_(Typed(AbstractSignalQueue))
@@ -267,6 +273,96 @@ class QueuedEpochOutput(BufferedOutput):
         duration = factory.get_duration()
         self.queue.append(factory, averages, iti_duration, duration, setting)
 
+    def add_settings(self, settings, averages=None, iti_duration=None):
+        '''
+        Add multiple settings to the queue
+
+        Unlike `add_setting`, the waveforms for all settings are rendered up
+        front as a single batch and queued as arrays, so no synthesis is done
+        for each trial. The token must have a finite duration.
+        '''
+        with enaml.imports():
+            from .output_manifest import initialize_factory, render_batch
+
+        contexts, trials, delays, durations = [], [], [], []
+        for setting in settings:
+            context = setting.copy()
+            if averages is None:
+                trials.append(context.pop(f'{self.name}_averages'))
+            else:
+                trials.append(averages)
+            if iti_duration is None:
+                delays.append(context.pop(f'{self.name}_iti_duration'))
+            else:
+                delays.append(iti_duration)
+            contexts.append(context)
+            # Creating the factory is inexpensive. It is the only reliable way
+            # to get the duration of the token.
+            factory = initialize_factory(self, self.token, context)
+            durations.append(factory.get_duration())
+
+        if not contexts:
+            return
+        if np.isinf(max(durations)):
+            raise ValueError('Cannot render tokens with an infinite duration')
+
+        samples = int(round(max(durations)*self.fs))
+        waveforms = render_batch(self, self.token, contexts, samples)
+        for setting, waveform, n, delay, duration in \
+                zip(settings, waveforms, trials, delays, durations):
+            waveform = waveform[:int(round(duration*self.fs))]
+            self.queue.append(waveform, n, delay, duration, setting)
+
+    def prerender(self, max_workers=None):
+        '''
+        Render all factories in the queue into a memory-mapped stimulus bank
+
+        Each unique waveform is rendered once (in parallel across processes)
+        into a bank in the cache folder and the factories in the queue are
+        replaced by slices of the bank, so generating samples for the output
+        only requires a copy. The bank is keyed by the token, the class of
+        each factory, the settings, sampling rate and calibration, so it is
+        reused by later sessions with identical settings. Factories with an
+        infinite duration are left as-is.
+        '''
+        with enaml.imports():
+            from .output_manifest import get_parameters
+
+        names = get_parameters(self, self.token)
+        queue_keys = {}
+        waveforms = {}
+        for queue_key, source, metadata in self.queue.iter_sources():
+            if not hasattr(source, 'reset'):
+                continue
+            source.reset()
+            samples = source.get_remaining_samples()
+            if np.isinf(samples):
+                continue
+            context = {n: metadata[n] for n in names}
+            waveform_key = content_key(self.name, factory_id(source), context)
+            waveforms.setdefault(waveform_key, (source, int(samples)))
+            queue_keys[queue_key] = waveform_key
+
+        if not waveforms:
+            return
+
+        jobs, bounds, lb = [], {}, 0
+        for waveform_key, (factory, samples) in waveforms.items():
+            jobs.append((factory, lb, samples))
+            bounds[waveform_key] = lb, lb+samples
+            lb += samples
+
+        log.info('Prerendering %d waveforms for %s', len(jobs), self.name)
+        bank_key = (self.token.name, list(bounds.items()), self.fs,
+                    self.calibration)
+        render = partial(render_waveforms, jobs, max_workers=max_workers)
+        bank = STIMULUS_BANK.get(bank_key, lb, render)
+        sources = {}
+        for queue_key, waveform_key in queue_keys.items():
+            lb, ub = bounds[waveform_key]
+            sources[queue_key] = bank[lb:ub]
+        self.queue.replace_sources(sources)
+
     def activate(self, offset):
         log.debug('Activating output at %d', offset)
         super().activate(offset)
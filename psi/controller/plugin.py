@@ -2,6 +2,7 @@ import logging
 log = logging.getLogger(__name__)
 
 from functools import partial
+import itertools
 import operator as op
 import threading
 
@@ -9,7 +10,6 @@ import numpy as np
 
 from atom.api import Enum, Bool, Typed, Property
 from enaml.application import deferred_call
-from enaml.qt.QtCore import QTimer
 from enaml.workbench.api import Extension
 from enaml.workbench.plugin import Plugin
 
@@ -24,6 +24,7 @@ from .experiment_action import (ExperimentAction, ExperimentActionBase,
                                 ExperimentCallback, ExperimentEvent,
                                 ExperimentState)
 from .output import ContinuousOutput, EpochOutput
+from .scheduler import Scheduler
 
 
 IO_POINT = 'psi.controller.io'
@@ -177,7 +178,9 @@ class ControllerPlugin(Plugin):
     _events = Typed(dict, {})
     _states = Typed(dict, {})
     _action_context = Typed(dict, {})
-    _timers = Typed(dict, {})
+
+    # Fires delayed events and timers against the master engine clock.
+    _scheduler = Typed(Scheduler)
 
     # Plugin actions are automatically registered when the manifests are
     # loaded. In contrast, registered actions are registered by setup code
@@ -187,6 +190,16 @@ class ControllerPlugin(Plugin):
     _registered_actions = Typed(list, {})
     _actions = Property()
 
+    # Dispatch table mapping each event name to the actions that need to be
+    # evaluated when the event occurs (see `_compile_actions`). This is
+    # rebuilt on demand whenever the list of actions changes.
+    _action_index = Typed(dict)
+    _action_default = Typed(list)
+    _action_dependencies = Typed(set)
+
+    def _default__scheduler(self):
+        return Scheduler(self.get_ts)
+
     def _get__actions(self):
         return self._registered_actions + self._plugin_actions
 
@@ -338,6 +351,7 @@ class ControllerPlugin(Plugin):
         self._events = events
         self._plugin_actions = actions
         self._action_context = context
+        self._action_index = None
 
     def register_action(self, event, command, kwargs=None):
         if kwargs is None:
@@ -349,6 +363,77 @@ class ControllerPlugin(Plugin):
             action = ExperimentCallback(event=event, callback=command,
                                         kwargs=kwargs)
         self._registered_actions.append(action)
+        self._action_index = None
+
+    def _is_gated(self, action, triggers):
+        '''
+        True if action can only match when one of the trigger events occurs
+
+        Only actions whose remaining dependencies are all boolean flags
+        maintained by the plugin (i.e., events and `<state>_active` flags) can
+        be gated since any other name (e.g., `level` in `experiment_end or
+        level > 40`) may take on values other than True or False. The match
+        expression is evaluated with all trigger events set to False for every
+        possible combination of the remaining flags. If it never matches, it
+        is safe to skip evaluating the action for events it does not depend
+        on.
+        '''
+        flags = set(self._events) | set(self._action_context)
+        others = [d for d in set(action.dependencies) if d not in triggers]
+        if len(others) > 8 or not flags.issuperset(others):
+            return False
+        context = dict.fromkeys(triggers, False)
+        for values in itertools.product((False, True), repeat=len(others)):
+            context.update(zip(others, values))
+            try:
+                if action.match(context):
+                    return False
+            except Exception:
+                return False
+        return True
+
+    def _compile_actions(self):
+        '''
+        Build the event to action dispatch table
+
+        Most actions are triggered by an expression that can only be true when
+        one of the events it depends on occurs (e.g., `experiment_end and not
+        task_active`). These are indexed under each event they depend on.
+        Remaining actions (e.g., those that depend on names not yet available
+        in the context) are evaluated on every event as before. Order of
+        actions within each list is preserved.
+        '''
+        actions = self._actions
+        events = set(self._events)
+        dependencies = set()
+        gated = []
+        for action in actions:
+            dependencies.update(action.dependencies)
+            triggers = events.intersection(action.dependencies)
+            if triggers and self._is_gated(action, triggers):
+                gated.append(triggers)
+            else:
+                gated.append(None)
+
+        index = {e: [] for t in gated if t is not None for e in t}
+        default = []
+        for action, triggers in zip(actions, gated):
+            if triggers is None:
+                default.append(action)
+                for event_actions in index.values():
+                    event_actions.append(action)
+            else:
+                for event_name in triggers:
+                    index[event_name].append(action)
+
+        self._action_dependencies = dependencies
+        self._action_default = default
+        self._action_index = index
+
+    def _get_event_actions(self, event_name):
+        if self._action_index is None:
+            self._compile_actions()
+        return self._action_index.get(event_name, self._action_default)
 
     def finalize_io(self):
         self._connect_outputs()
@@ -370,10 +455,7 @@ class ControllerPlugin(Plugin):
             engine.start()
 
     def stop_engines(self):
-        for name, timer in list(self._timers.items()):
-            timer.timeout.disconnect()
-            timer.stop()
-            del self._timers[name]
+        self._scheduler.cancel_all()
         for engine in self._engines.values():
             engine.stop()
 
@@ -425,12 +507,15 @@ class ControllerPlugin(Plugin):
                        cancel_existing=True, kw=None):
         log.debug('Invoking actions for %s', event_name)
         if cancel_existing:
-            deferred_call(self.stop_timer, event_name)
+            self.stop_timer(event_name)
         if delayed:
             delay = timestamp-self.get_ts()
             if delay > 0:
-                cb = lambda: self._invoke_actions(event_name, timestamp)
-                deferred_call(self.start_timer, event_name, delay, cb)
+                # The scheduler thread only handles the timing. Actions may
+                # update the GUI, so they are dispatched to the GUI thread.
+                cb = partial(deferred_call, self._invoke_actions, event_name,
+                             timestamp)
+                self._scheduler.schedule_at(event_name, timestamp, cb)
                 return
         self._invoke_actions(event_name, timestamp, kw)
 
@@ -454,17 +539,16 @@ class ControllerPlugin(Plugin):
         used : bool
             True if event is bound to an action, False otherwise.
         '''
-        for action in self._actions:
-            if event_name in action.dependencies:
-                return True
-        return False
+        if self._action_index is None:
+            self._compile_actions()
+        return event_name in self._action_dependencies
 
     def _invoke_actions(self, event_name, timestamp=None, kw=None):
         log.debug('Triggering event {}'.format(event_name))
 
-        if timestamp is not None:
+        if timestamp is not None and self.event_used('experiment_event'):
             data = {'event': event_name, 'timestamp': timestamp}
-            self.invoke_actions('experiment_event', kw={'data': data})
+            self._invoke_actions('experiment_event', kw={'data': data})
 
         # If this is a stateful event, update the associated state.
         if event_name.endswith('_start'):
@@ -474,13 +558,17 @@ class ControllerPlugin(Plugin):
             key = event_name[:-4]
             self._action_context[key + '_active'] = False
 
+        actions = self._get_event_actions(event_name)
+        if not actions:
+            return
+
         # Make a copy of the context and set the event to True. We don't want
         # to set the state on the main context since it may affect recursive
         # notifications.
         context = self._action_context.copy()
         context[event_name] = True
 
-        for action in self._actions:
+        for action in actions:
             if action.match(context):
                 log.debug('... invoking action %s', action)
                 self._invoke_action(action, event_name, timestamp, kw)
@@ -541,16 +629,27 @@ class ControllerPlugin(Plugin):
         deferred_call(lambda: setattr(self, '_pause_ok', value))
 
     def start_timer(self, name, duration, callback):
+        '''
+        Call callback on the GUI thread after duration (in seconds)
+
+        The timer is run by the scheduler thread and the callback is then
+        dispatched to the GUI thread. Starting a timer with the same name as a
+        pending one cancels the pending timer.
+        '''
         log.debug('Starting %f sec. timer %s', duration, name)
-        timer = QTimer()
-        timer.timeout.connect(callback)
-        timer.setSingleShot(True)
-        timer.start(duration*1e3)
-        self._timers[name] = timer
+        self._scheduler.schedule_in(name, duration,
+                                    partial(deferred_call, callback))
 
     def stop_timer(self, name):
-        if self._timers.get(name) is not None:
-            self._timers[name].timeout.disconnect()
-            self._timers[name].stop()
-            del self._timers[name]
+        if self._scheduler.cancel(name):
             log.debug('Disabled deferred event %s', name)
+
+    def get_timer_stats(self):
+        '''
+        Return jitter statistics for delayed events and timers
+
+        Jitter is measured when the scheduler thread fires the event, before
+        the actions or timer callback are dispatched to the GUI thread. See
+        `Scheduler.get_stats` for details.
+        '''
+        return self._scheduler.get_stats()
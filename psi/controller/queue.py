@@ -99,6 +99,25 @@ class AbstractSignalQueue:
         self._ordering.append(k)
         return k
 
+    def iter_sources(self):
+        '''
+        Iterate over the key, source and metadata of each item in the queue
+        '''
+        for key, data in list(self._data.items()):
+            yield key, data['source'], data['metadata']
+
+    def replace_sources(self, mapping):
+        '''
+        Replace the source of items in the queue
+
+        Parameters
+        ----------
+        mapping : dict
+            Mapping of key to the new source (e.g., a prerendered waveform).
+        '''
+        for key, source in mapping.items():
+            self._data[key]['source'] = source
+
     def count_factories(self):
         return len(self._ordering)
 
@@ -0,0 +1,199 @@
+import logging
+log = logging.getLogger(__name__)
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class Scheduler:
+    '''
+    Fires timed events from a dedicated thread
+
+    Pending events are kept in a heap ordered by deadline. The thread sleeps
+    until shortly before the next deadline and then polls the performance
+    counter for the remainder so that timing precision is not limited by the
+    GUI event loop or the granularity of the OS sleep. While polling, the
+    thread yields the GIL on each iteration so that acquisition and output
+    callbacks in other threads are not starved. The resulting jitter is
+    reported by `get_stats`. Callbacks are run in the scheduler thread; if
+    they need to update the GUI they should dispatch that work themselves
+    (e.g., using `deferred_call`) so the next event is not delayed.
+
+    Deadlines passed to `schedule_at` are in units of `clock` (typically the
+    timestamp of the master engine). To avoid polling a potentially expensive
+    hardware clock, each deadline is converted to the high-resolution
+    performance counter when scheduled. The clock is read once more when the
+    event fires to measure jitter.
+
+    Parameters
+    ----------
+    clock : {None, callable}
+        Function that returns the current time in seconds. If None, the
+        performance counter is used.
+    spin : float
+        Time, in seconds, before the deadline at which the thread stops
+        sleeping and starts polling the performance counter.
+    '''
+
+    def __init__(self, clock=None, spin=1e-3):
+        self._clock = clock
+        self._spin = spin
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self.reset_stats()
+
+    def clock(self):
+        if self._clock is None:
+            return time.perf_counter()
+        return self._clock()
+
+    def schedule_at(self, name, timestamp, callback):
+        '''
+        Schedule callback to be called when `clock` reaches timestamp
+
+        Any pending event with the same name is cancelled.
+        '''
+        delay = timestamp - self.clock()
+        self._schedule(name, delay, timestamp, callback)
+
+    def schedule_in(self, name, delay, callback):
+        '''
+        Schedule callback to be called after delay (in seconds)
+
+        Any pending event with the same name is cancelled.
+        '''
+        self._schedule(name, delay, None, callback)
+
+    def _schedule(self, name, delay, timestamp, callback):
+        deadline = time.perf_counter() + max(delay, 0)
+        # The last element is set to False when the event is cancelled. The
+        # entry is left in the heap and discarded when it reaches the top.
+        entry = [deadline, next(self._counter), name, timestamp, callback,
+                 True]
+        with self._condition:
+            self._cancel(name)
+            self._entries[name] = entry
+            heapq.heappush(self._heap, entry)
+            self._start_thread()
+            self._condition.notify()
+        log.debug('Scheduled %s in %f sec.', name, delay)
+
+    def _cancel(self, name):
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            entry[-1] = False
+            log.debug('Cancelled scheduled event %s', name)
+            return True
+        return False
+
+    def cancel(self, name):
+        '''
+        Cancel pending event. Returns True if an event was cancelled.
+        '''
+        with self._condition:
+            return self._cancel(name)
+
+    def cancel_all(self):
+        with self._condition:
+            for entry in self._heap:
+                entry[-1] = False
+            self._heap = []
+            self._entries = {}
+            self._condition.notify()
+
+    def pending(self):
+        '''
+        Return names of pending events in the order they will fire
+        '''
+        with self._condition:
+            entries = sorted(e for e in self._heap if e[-1])
+            return [e[2] for e in entries]
+
+    def _start_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name='psi-scheduler')
+            self._thread.start()
+
+    def _next_entry(self):
+        # Called with the condition held. Blocks until the next event is due
+        # (or within `spin` of being due) and returns it.
+        while True:
+            while self._heap and not self._heap[0][-1]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                self._condition.wait()
+                continue
+            timeout = self._heap[0][0] - time.perf_counter() - self._spin
+            if timeout <= 0:
+                return self._heap[0]
+            self._condition.wait(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                entry = self._next_entry()
+
+            deadline = entry[0]
+            while time.perf_counter() < deadline:
+                # Release the GIL so other threads can run while we wait.
+                time.sleep(0)
+
+            with self._condition:
+                # Make sure it was not cancelled or replaced while we were
+                # spinning.
+                if not entry[-1] or not self._heap or self._heap[0] is not entry:
+                    continue
+                heapq.heappop(self._heap)
+                del self._entries[entry[2]]
+                entry[-1] = False
+
+            _, _, name, timestamp, callback, _ = entry
+            if timestamp is None:
+                jitter = time.perf_counter() - deadline
+            else:
+                jitter = self.clock() - timestamp
+            self._update_stats(jitter)
+            log.debug('Firing scheduled event %s (jitter %f sec.)', name,
+                      jitter)
+            try:
+                callback()
+            except Exception as e:
+                log.exception(e)
+
+    def reset_stats(self):
+        self._n = 0
+        self._mean = 0
+        self._m2 = 0
+        self._min = None
+        self._max = None
+
+    def _update_stats(self, jitter):
+        # Welford's online algorithm for the running mean and variance.
+        self._n += 1
+        delta = jitter - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (jitter - self._mean)
+        self._min = jitter if self._min is None else min(self._min, jitter)
+        self._max = jitter if self._max is None else max(self._max, jitter)
+
+    def get_stats(self):
+        '''
+        Return jitter statistics (in seconds) for all events fired so far
+
+        Jitter is the difference between the time the event fired and the
+        scheduled deadline.
+        '''
+        std = (self._m2 / (self._n - 1))**0.5 if self._n > 1 else 0
+        return {
+            'n': self._n,
+            'mean': self._mean,
+            'std': std,
+            'min': self._min,
+            'max': self._max,
+        }
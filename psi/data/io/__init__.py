@@ -9,7 +9,10 @@ experiment type.
 import logging
 log = logging.getLogger(__name__)
 
+import copy
 import functools
+import operator
+import os
 from pathlib import Path
 
 import numpy as np
@@ -21,6 +24,31 @@ def get_unique_columns(df, exclude=None):
     return [c for c in df if (len(df[c].unique()) > 1) and (c not in exclude)]
 
 
+#: Operators that can be used in queries (see `Recording.query`).
+QUERY_OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'lt': operator.lt,
+    'le': operator.le,
+    'gt': operator.gt,
+    'ge': operator.ge,
+    'in': np.isin,
+}
+
+
+def parse_predicate(key):
+    '''
+    Split query keyword (e.g., `level__ge`) into column name and operator
+
+    If the keyword does not end with the name of an operator, the operator
+    defaults to `eq`.
+    '''
+    name, _, op = key.rpartition('__')
+    if name and op in QUERY_OPERATORS:
+        return name, QUERY_OPERATORS[op]
+    return key, QUERY_OPERATORS['eq']
+
+
 class Recording:
     '''
     Wrapper around a recording created by psiexperiment
@@ -40,6 +68,8 @@ class Recording:
         List of Bcolz ctables in this recording
     ttable_names : set
         List of CSV-formatted tables in this recording
+    array_names : set
+        List of memory-mapped arrays (see `array_tools`) in this recording
 
     The `__getattr__` method is implemented to allow accessing arrays and
     tables by name. For example, if you have a ctable called `erp_metadata`:
@@ -60,6 +90,17 @@ class Recording:
     #: loading tables into DataFrames.
     _ttable_indices = {}
 
+    #: Name of table containing one row per epoch. Subclasses that support
+    #: `select` must set this.
+    _select_table = None
+
+    #: Indices of the rows in `_select_table` included by `select`. If None,
+    #: all rows are included.
+    _selection = None
+
+    #: Predicates passed to `select`. If None, all rows are included.
+    selection = None
+
     def __init__(self, base_path):
         bp = Path(base_path)
         self.base_path = bp
@@ -76,10 +117,19 @@ class Recording:
         self.carray_names = {d.parent.stem for d in bp.glob('*/meta')}
         self.ctable_names = {d.parent.parent.stem for d in bp.glob('*/*/meta')}
         self.ttable_names = {d.stem for d in bp.glob('*.csv')}
+        self.array_names = {d.stem for d in bp.glob('*.npy') \
+                            if d.with_suffix('.json').exists()}
 
     def __getattr__(self, attr):
+        # Special methods are looked up by `copy` before the instance
+        # attributes are restored, so do not attempt to find them in the
+        # recording.
+        if attr.startswith('__'):
+            raise AttributeError(attr)
         if attr in self.carray_names:
             return self._load_bcolz_signal(attr)
+        if attr in self.array_names:
+            return self._load_array_signal(attr)
         if attr in self.ctable_names:
             return self._load_bcolz_table(attr)
         elif attr in self.ttable_names:
@@ -94,6 +144,8 @@ class Recording:
             lines.append(f'* Bcolz ctables {self.ctable_names}')
         if self.ttable_names:
             lines.append(f'* CSV tables {self.ttable_names}')
+        if self.array_names:
+            lines.append(f'* Arrays {self.array_names}')
         return '\n'.join(lines)
 
     @functools.lru_cache()
@@ -101,9 +153,18 @@ class Recording:
         from .bcolz_tools import BcolzSignal
         return BcolzSignal(self.base_path / name)
 
+    @functools.lru_cache()
+    def _load_array_signal(self, name):
+        from .array_tools import ArraySignal
+        return ArraySignal(self.base_path / name)
+
     @functools.lru_cache()
     def _load_bcolz_table(self, name):
-        from .bcolz_tools import load_ctable_as_df
+        from .bcolz_tools import load_ctable_as_df, load_ctable_columns
+        if self._selection is not None and name == self._select_table:
+            # Only load the selected rows.
+            return load_ctable_columns(self.base_path / name,
+                                       rows=self._selection)
         return load_ctable_as_df(self.base_path / name)
 
     @functools.lru_cache()
@@ -115,11 +176,147 @@ class Recording:
         index_col = self._ttable_indices.get(name, None)
         df = pd.read_csv(path, index_col=index_col)
         drop = [c for c in df.columns if c.startswith('Unnamed:')]
-        return df.drop(columns=drop)
+        df = df.drop(columns=drop)
+        if self._selection is not None and name == self._select_table:
+            df = df.iloc[self._selection]
+        return df
+
+    @functools.lru_cache()
+    def get_column_names(self, table_name):
+        '''
+        Return names of columns in table without loading the table
+        '''
+        if table_name in self.ctable_names:
+            from .bcolz_tools import get_ctable_names
+            return get_ctable_names(self.base_path / table_name)
+        recording = copy.copy(self)
+        recording._selection = None
+        return recording._load_text_table(table_name).columns.tolist()
+
+    @functools.lru_cache()
+    def get_column(self, table_name, column_name):
+        '''
+        Return values of column in table as an array
+
+        For Bcolz ctables, only the requested column is loaded from disk.
+        Columns are cached, so they can be efficiently queried repeatedly.
+        Rows excluded by `select` are included.
+        '''
+        if table_name in self.ctable_names:
+            from .bcolz_tools import load_ctable_columns
+            path = self.base_path / table_name
+            return load_ctable_columns(path, [column_name])[column_name].values
+        recording = copy.copy(self)
+        recording._selection = None
+        return recording._load_text_table(table_name)[column_name].values
+
+    def query(self, table_name, **predicates):
+        '''
+        Return indices of rows in table matching all predicates
+
+        Each keyword is the name of a column, optionally followed by two
+        underscores and an operator (one of eq, ne, lt, le, gt, ge or in). If
+        no operator is given, eq is used. For example, `level__ge=40` matches
+        rows where level is at least 40 and `frequency__in=[4000, 8000]`
+        matches rows where frequency is either 4000 or 8000.
+
+        Only the columns needed to evaluate the predicates are loaded.
+        '''
+        if not predicates:
+            raise ValueError('Must provide at least one predicate')
+        mask = None
+        for key, value in predicates.items():
+            name, op = parse_predicate(key)
+            m = op(self.get_column(table_name, name), value)
+            mask = m if mask is None else (mask & m)
+        return np.flatnonzero(mask)
+
+    def select(self, **predicates):
+        '''
+        Return copy of recording limited to epochs matching predicates
+
+        See `query` for the format of the predicates. Only the matching rows
+        of the epoch table are loaded and only the matching epochs are read
+        from the signal. For example:
+
+            recording.select(frequency=8000, level__ge=40).get_epochs()
+        '''
+        if self._select_table is None:
+            raise NotImplementedError('Recording does not support select')
+        rows = self.query(self._select_table, **predicates)
+        if self._selection is not None:
+            rows = np.intersect1d(rows, self._selection)
+        recording = copy.copy(self)
+        recording._selection = rows
+        recording.selection = {**(self.selection or {}), **predicates}
+        return recording
 
 
 class Signal:
 
+    #: Number of samples in each chunk of the underlying storage. Reads by
+    #: `gather` are aligned to chunk boundaries so that each chunk is only
+    #: decompressed once.
+    chunk_samples = 1
+
+    #: Minimum number of samples to read from the underlying storage at a time
+    #: when gathering segments.
+    block_samples = 2**20
+
+    def gather(self, indices, samples):
+        '''
+        Return segments starting at each index as a 2D array
+
+        Segments are read in order of increasing index in large blocks that
+        are aligned to the chunks of the underlying storage, so each chunk is
+        read at most once regardless of the number of segments it contains.
+
+        Parameters
+        ----------
+        indices : array of int
+            Index of first sample in each segment. Can be in any order. All
+            segments must fall within the signal.
+        samples : int
+            Number of samples in each segment.
+
+        Returns
+        -------
+        values : array
+            Array of shape (len(indices), samples). Row i is the segment
+            starting at indices[i].
+        '''
+        indices = np.asarray(indices)
+        values = np.empty((len(indices), samples))
+        chunk = self.chunk_samples
+        n = self.shape[-1]
+
+        data = np.empty(0)
+        data_lb = data_ub = 0
+        for j in np.argsort(indices, kind='stable'):
+            lb = int(indices[j])
+            ub = lb + samples
+            if ub > data_ub:
+                # Read the next block starting at the end of the prior block or
+                # at the chunk containing the segment (if there is a gap). Any
+                # samples needed from the prior block are kept.
+                if lb < data_ub:
+                    keep = data[lb-data_lb:]
+                    read_lb = data_ub
+                else:
+                    keep = data[:0]
+                    read_lb = lb // chunk * chunk
+                read_ub = max(read_lb + self.block_samples, ub)
+                read_ub = min(-(-read_ub // chunk) * chunk, n)
+                data = self[read_lb:read_ub]
+                if len(keep):
+                    data = np.concatenate((keep, data))
+                    data_lb = lb
+                else:
+                    data_lb = read_lb
+                data_ub = read_ub
+            values[j] = data[lb-data_lb:ub-data_lb]
+        return values
+
     def get_epochs(self, md, offset, duration, detrend=None, columns='auto'):
         fn = self.get_segments
         return self._get_epochs(fn, md, offset, duration, detrend=detrend,
@@ -151,10 +348,9 @@ class Signal:
         m = (indices >= 0) & ((indices + samples) < self.shape[-1])
         if not m.all():
             i = np.flatnonzero(~m)
-            log.warn('Missing epochs %d', i)
+            log.warning('Missing epochs %r', i)
 
-        values = np.concatenate([self[i:i+samples][np.newaxis] \
-                                 for i in indices[m]])
+        values = self.gather(indices[m], samples)
         if detrend is not None:
             values = signal.detrend(values, axis=-1, type=detrend)
 
@@ -164,25 +360,189 @@ class Signal:
         df = pd.DataFrame(values, index=index, columns=columns)
         return df.reindex(times)
 
-    def _get_segments_filtered(self, fn, offset, duration, filter_lb, filter_ub,
-                               filter_order=1, detrend='constant',
-                               pad_duration=10e-3):
-        Wn = (filter_lb/(0.5*self.fs), filter_ub/(0.5*self.fs))
-        b, a = signal.iirfilter(filter_order, Wn, btype='band', ftype='butter')
-        df = fn(offset-pad_duration, duration+pad_duration, detrend)
-        df[:] = signal.filtfilt(b, a, df.values, axis=-1)
-        return df.loc[:, offset:offset+duration]
-
     def get_random_segments(self, n, offset, duration, detrend):
         t_min = -offset
         t_max = self.duration-duration-offset
         times = np.random.uniform(t_min, t_max, size=n)
         return self.get_segments(times, offset, duration, detrend)
 
-    def get_segments_filtered(self, times, *args, **kwargs):
-        fn = functools.partial(self.get_segments, times)
-        return self._get_segments_filtered(fn, *args, **kwargs)
+    def get_segments_filtered(self, times, offset, duration, filter_lb,
+                              filter_ub, filter_order=1, detrend='constant',
+                              pad_duration=10e-3):
+        # Since the continuous signal is filtered, pad_duration is no longer
+        # needed. It is kept for compatibility.
+        filtered = self.filter(filter_lb, filter_ub, filter_order)
+        return filtered.get_segments(times, offset, duration, detrend)
+
+    def get_random_segments_filtered(self, n, offset, duration, filter_lb,
+                                     filter_ub, filter_order=1,
+                                     detrend='constant', pad_duration=10e-3):
+        filtered = self.filter(filter_lb, filter_ub, filter_order)
+        return filtered.get_random_segments(n, offset, duration, detrend)
+
+    def get_cache_file(self, name, *args):
+        '''
+        Return filename to save data derived from this signal to
+
+        Parameters
+        ----------
+        name : str
+            Name of the derived data (e.g., 'filtered').
+        *args
+            Parameters used to derive the data.
+
+        Returns
+        -------
+        {None, Path}
+            If None, the signal is not stored on disk and derived data should
+            be kept in memory.
+        '''
+        return None
+
+    @functools.lru_cache()
+    def filter(self, filter_lb, filter_ub, filter_order=1):
+        '''
+        Return zero-phase bandpass filtered copy of the signal
+
+        The entire signal is filtered once and, if the signal is stored on
+        disk, saved to the cache folder so that it can be reused across
+        sessions.
+
+        Parameters
+        ----------
+        filter_lb : float
+            Lower bound of filter passband, in Hz.
+        filter_ub : float
+            Upper bound of filter passband, in Hz.
+        filter_order : int
+            Filter order. Note that the effective order will be double this
+            since we use zero-phase filtering.
+
+        Returns
+        -------
+        FilteredSignal
+        '''
+        filename = self.get_cache_file('filtered', filter_lb, filter_ub,
+                                       filter_order)
+        return FilteredSignal(self, filter_lb, filter_ub, filter_order,
+                              filename)
+
+
+def sosfiltfilt_blocks(sos, x, out, block_samples):
+    '''
+    Zero-phase filter signal in blocks
+
+    Equivalent to `scipy.signal.sosfiltfilt(sos, x, padlen=0)`, but only
+    `block_samples` samples of `x` are loaded into memory at a time. The
+    forward pass is written to `out` and then filtered in reverse.
+
+    Parameters
+    ----------
+    sos : array
+        Second-order sections of filter.
+    x : array-like
+        1D signal that supports slicing (e.g., a `Signal`).
+    out : array
+        Array (e.g., a memory-mapped file) to write the result to.
+    block_samples : int
+        Number of samples to filter at a time.
+    '''
+    n = out.shape[-1]
+    zi = signal.sosfilt_zi(sos)
+    z = None
+    for lb in range(0, n, block_samples):
+        ub = min(lb + block_samples, n)
+        block = x[lb:ub]
+        if z is None:
+            z = zi * block[0]
+        out[lb:ub], z = signal.sosfilt(sos, block, zi=z)
+
+    z = None
+    for ub in range(n, 0, -block_samples):
+        lb = max(ub - block_samples, 0)
+        block = out[lb:ub][::-1]
+        if z is None:
+            z = zi * block[0]
+        block, z = signal.sosfilt(sos, block, zi=z)
+        out[lb:ub] = block[::-1]
+    return out
+
+
+class FilteredSignal(Signal):
+    '''
+    Zero-phase bandpass filtered copy of a signal
+
+    The signal is filtered in blocks so that it never has to be loaded into
+    memory. If a filename is provided, the result is saved as a NPY file and
+    memory-mapped. If the file already exists, it is reused.
+
+    Parameters
+    ----------
+    source : Signal
+        Signal to filter.
+    filter_lb : float
+        Lower bound of filter passband, in Hz.
+    filter_ub : float
+        Upper bound of filter passband, in Hz.
+    filter_order : int
+        Filter order. Note that the effective order will be double this since
+        we use zero-phase filtering.
+    filename : {None, str, Path}
+        File to save the filtered signal to. If None, the filtered signal is
+        kept in memory.
+    '''
 
-    def get_random_segments_filtered(self, n, *args, **kwargs):
-        fn = functools.partial(self.get_random_segments, n)
-        return self._get_segments_filtered(fn, *args, **kwargs)
+    def __init__(self, source, filter_lb, filter_ub, filter_order=1,
+                 filename=None):
+        self.source = source
+        self.filter_lb = filter_lb
+        self.filter_ub = filter_ub
+        self.filter_order = filter_order
+        self.filename = filename
+        self.array = self._load()
+
+    def _load(self):
+        if self.filename is not None and os.path.exists(self.filename):
+            return np.load(self.filename, mmap_mode='r')
+
+        Wn = (self.filter_lb/(0.5*self.fs), self.filter_ub/(0.5*self.fs))
+        sos = signal.iirfilter(self.filter_order, Wn, btype='band',
+                               ftype='butter', output='sos')
+        chunk = self.source.chunk_samples
+        block_samples = -(-self.source.block_samples // chunk) * chunk
+        shape = self.source.shape
+
+        if self.filename is None:
+            return sosfiltfilt_blocks(sos, self.source, np.empty(shape),
+                                      block_samples)
+
+        log.info('Filtering %s', self.filename)
+        # Write to a temporary file and then move it into place so that an
+        # incomplete file is never loaded.
+        tmp_filename = f'{self.filename}.{os.getpid()}.tmp'
+        try:
+            out = np.lib.format.open_memmap(tmp_filename, mode='w+',
+                                            dtype=np.double, shape=shape)
+            sosfiltfilt_blocks(sos, self.source, out, block_samples)
+            out.flush()
+            del out
+            os.replace(tmp_filename, self.filename)
+        finally:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+        return np.load(self.filename, mmap_mode='r')
+
+    @property
+    def fs(self):
+        return self.source.fs
+
+    @property
+    def duration(self):
+        return self.shape[-1]/self.fs
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    def __getitem__(self, slice):
+        return self.array[slice]
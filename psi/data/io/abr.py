@@ -4,13 +4,12 @@ Interface for reading tone-evoked ABR data generated by psiexperiment
 import logging
 log = logging.getLogger(__name__)
 
-from functools import lru_cache, partialmethod, wraps
-import json
+import copy
+from functools import lru_cache, partialmethod
 import os.path
 import shutil
 import re
 from glob import glob
-import pickle
 
 import bcolz
 import numpy as np
@@ -19,6 +18,7 @@ from scipy import signal
 
 from . import Recording
 from .bcolz_tools import repair_carray_size
+from .cache import cache
 
 
 # Max size of LRU cache
@@ -34,50 +34,6 @@ MERGE_PATTERN = \
     r'\g<experiment>*'
 
 
-def cache(f, name=None):
-    import inspect
-    s = inspect.signature(f)
-    if name is None:
-        name = f.__code__.co_name
-
-    @wraps(f)
-    def wrapper(self, *args, refresh_cache=False, **kwargs):
-        bound_args = s.bind(self, *args, **kwargs)
-        bound_args.apply_defaults()
-        cache_kwargs = dict(bound_args.arguments)
-        cache_kwargs.pop('self')
-        string = json.dumps(cache_kwargs, sort_keys=True, allow_nan=True)
-        uuid = hash(string)
-
-        cache_path = self.base_path / 'cache'
-        cache_path.mkdir(parents=True, exist_ok=True)
-        cache_file = cache_path / f'{name}-{uuid}-result.pkl'
-        kwargs_cache_file = cache_path / f'{name}-{uuid}-kwargs.pkl'
-
-        result = None
-        try:
-            if not refresh_cache and cache_file.exists():
-                result = pd.read_pickle(cache_file)
-                with open(kwargs_cache_file, 'wb') as fh:
-                    cache_kwargs = pickle.load(fh)
-                    if cache_kwargs != kwargs:
-                        raise ValueError('Cache is corrupted')
-        except:
-            # Cache is corrupted. Delete it.
-            cache_file.unlink()
-
-        if result is None:
-            result = f(self, *args, **kwargs)
-            result.to_pickle(cache_file)
-            with open(kwargs_cache_file, 'wb') as fh:
-                pickle.dump(kwargs, fh)
-
-        return result
-
-    return wrapper
-
-
-
 class ABRFile(Recording):
     '''
     Wrapper around an ABR file with methods for loading and querying data
@@ -88,9 +44,11 @@ class ABRFile(Recording):
         Path to folder containing ABR data
     '''
 
+    _select_table = 'erp_metadata'
+
     def __init__(self, *args, **kw):
         super().__init__(*args, **kw)
-        if 'eeg' not in self.carray_names:
+        if 'eeg' not in self.carray_names and 'eeg' not in self.array_names:
             raise ValueError('Missing eeg data')
         if 'erp_metadata' not in self.ctable_names:
             raise ValueError('Missing erp metadata')
@@ -147,12 +105,29 @@ class ABRFile(Recording):
         except KeyError:
             return default
 
+    def get_column(self, table_name, column_name):
+        # Support the names used by `erp_metadata`, which drops the
+        # `target_tone_` prefix.
+        if table_name == 'erp_metadata' and \
+                column_name not in self.get_column_names(table_name):
+            column_name = f'target_tone_{column_name}'
+        return super().get_column(table_name, column_name)
+
+    @property
+    def _cache_sources(self):
+        # Data used to compute the cached results. If any of these change, the
+        # cached results are recomputed.
+        eeg = 'eeg.npy' if 'eeg' in self.array_names else 'eeg'
+        return [eeg, 'erp_metadata']
+
     @property
     @lru_cache(maxsize=MAXSIZE)
     def eeg(self):
         '''
-        Continuous EEG signal in `BcolzSignal` format.
+        Continuous EEG signal in `BcolzSignal` or `ArraySignal` format.
         '''
+        if 'eeg' in self.array_names:
+            return self._load_array_signal('eeg')
         # Load and ensure that the EEG data is fine. If not, repair it and
         # reload the data.
         rootdir = self.base_path / 'eeg'
@@ -285,7 +260,7 @@ class ABRFile(Recording):
         if averages is np.inf:
             return result
         if averages is None:
-            averages = self.erp_metadata.loc[0, 'averages']
+            averages = self.erp_metadata['averages'].iloc[0]
 
         grouping = list(result.index.names)
         grouping.remove('t0')
@@ -341,6 +316,16 @@ class ABRSupersetFile:
         inst._base_path = base_path
         return inst
 
+    def select(self, **predicates):
+        '''
+        Return copy limited to epochs matching predicates
+
+        See `ABRFile.select`.
+        '''
+        inst = copy.copy(self)
+        inst._fh = [fh.select(**predicates) for fh in self._fh]
+        return inst
+
     @property
     def erp_metadata(self):
         result_set = [fh.erp_metadata for fh in self._fh]
@@ -411,8 +396,9 @@ common_docstring = '''
         detrend : {'constant', 'linear', None}
             Method for detrending
         pad_duration : float
-            Duration, in seconds, to pad epoch prior to filtering. The extra
-            samples will be discarded after filtering.
+            Not used. The continuous EEG is filtered before epochs are
+            extracted, so epochs no longer need to be padded. Retained for
+            compatibility.
         reject_threshold : {None, float}
             If None, use the value stored in the file. Otherwise, use the
             provided value. To return all epochs, use `np.inf`.
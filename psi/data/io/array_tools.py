@@ -0,0 +1,270 @@
+'''
+Storage of continuous signals as raw memory-mapped arrays
+
+This is an alternative to Bcolz that is better suited to high-rate,
+multichannel acquisition. Samples are appended to a NPY file that is
+preallocated (and grown as needed) so that each append is a single write to the
+end of the file. Sampling rate and other metadata are saved to a JSON file with
+the same name.
+
+The header of the NPY file is rewritten after each append to reflect the number
+of samples saved. If the program crashes, the file can be loaded as-is (the
+preallocated space beyond the saved samples is ignored by numpy). Multichannel
+data is saved in Fortran order with shape (channels, samples) so that samples
+from all channels are contiguous on disk and reads of a time range are
+zero-copy.
+'''
+import logging
+log = logging.getLogger(__name__)
+
+import functools
+import json
+import os
+from pathlib import Path
+import struct
+
+import numpy as np
+
+from . import Signal
+from .cache import get_signal_cache_file
+
+
+#: Size, in bytes, of the NPY header. The header is padded to this size so
+#: that it can be rewritten as the array grows without moving the data.
+HEADER_SIZE = 256
+
+#: Default number of samples to preallocate.
+DEFAULT_CAPACITY = 2**20
+
+
+def _to_json(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.items()}
+    return str(value)
+
+
+def is_array(path):
+    '''
+    Returns True if path (without the extension) is an array saved by
+    `ArrayWriter`
+    '''
+    path = Path(path)
+    return path.with_suffix('.npy').exists() and \
+        path.with_suffix('.json').exists()
+
+
+class ArrayWriter:
+    '''
+    Appends samples to a growable memory-mappable NPY file
+
+    Parameters
+    ----------
+    path : path
+        Path to save to. The data is saved to a file with the extension `.npy`
+        and attributes to a file with the extension `.json`.
+    dtype : numpy dtype
+        Datatype of the samples.
+    fs : float
+        Sampling rate of the samples.
+    expectedlen : {None, int}
+        Number of samples to preallocate. If more samples are appended, the
+        file is grown by doubling its size.
+    **metadata
+        Additional attributes to save.
+
+    Attributes
+    ----------
+    attrs : dict
+        Attributes saved to the JSON file. Call `flush` after modifying.
+    '''
+
+    def __init__(self, path, dtype, fs, expectedlen=None, **metadata):
+        path = Path(path)
+        self.data_path = path.with_suffix('.npy')
+        self.attrs_path = path.with_suffix('.json')
+        self.dtype = np.dtype(dtype)
+        self.attrs = {'fs': fs, **metadata}
+
+        self._n_channels = None
+        self._length = 0
+        self._capacity = 0
+        # Unbuffered so that the samples and header are passed to the OS on
+        # each append and survive a crash of the program.
+        self._fh = open(self.data_path, 'w+b', buffering=0)
+        self._write_header()
+        self._resize(DEFAULT_CAPACITY if expectedlen is None else expectedlen)
+        self._write_attrs()
+
+    @property
+    def shape(self):
+        if self._n_channels is None:
+            return (self._length,)
+        return (self._n_channels, self._length)
+
+    def __len__(self):
+        return self._length
+
+    def _frame_size(self):
+        return self.dtype.itemsize * (self._n_channels or 1)
+
+    def _write_header(self):
+        header = {
+            'descr': np.lib.format.dtype_to_descr(self.dtype),
+            'fortran_order': self._n_channels is not None,
+            'shape': self.shape,
+        }
+        magic = np.lib.format.magic(1, 0)
+        header_len = HEADER_SIZE - len(magic) - 2
+        header = repr(header).ljust(header_len - 1) + '\n'
+        self._fh.seek(0)
+        self._fh.write(magic + struct.pack('<H', header_len) +
+                       header.encode('latin1'))
+
+    def _write_attrs(self):
+        with open(self.attrs_path, 'w') as fh:
+            json.dump(_to_json(self.attrs), fh, indent=4)
+
+    def _resize(self, capacity):
+        # Truncating to a larger size allocates the space without writing it
+        # (on most filesystems).
+        self._capacity = capacity
+        self._fh.truncate(HEADER_SIZE + capacity * self._frame_size())
+
+    def append(self, data):
+        '''
+        Append samples
+
+        Parameters
+        ----------
+        data : array
+            Array of shape (samples,) or (channels, samples). The number of
+            channels must be the same for all calls.
+        '''
+        data = np.asarray(data, dtype=self.dtype)
+        if self._length == 0 and self._n_channels is None and data.ndim == 2:
+            self._n_channels = data.shape[0]
+            self._resize(self._capacity)
+        if data.ndim != len(self.shape) or data.shape[:-1] != self.shape[:-1]:
+            raise ValueError(f'Cannot append data of shape {data.shape} to '
+                             f'array of shape {self.shape}')
+
+        n = data.shape[-1]
+        if self._length + n > self._capacity:
+            self._resize(max(self._capacity * 2, self._length + n))
+        self._fh.seek(HEADER_SIZE + self._length * self._frame_size())
+        # Transposing (channels, samples) gives the Fortran-ordered layout.
+        self._fh.write(np.ascontiguousarray(data.T).tobytes())
+        self._length += n
+        self._write_header()
+
+    def __getitem__(self, slice):
+        order = 'C' if self._n_channels is None else 'F'
+        array = np.memmap(self.data_path, self.dtype, 'r', HEADER_SIZE,
+                          self.shape, order)
+        return array[slice]
+
+    def flush(self):
+        self._write_attrs()
+        if not self._fh.closed:
+            os.fsync(self._fh.fileno())
+
+    def close(self):
+        '''
+        Flush and release preallocated space that was not used
+        '''
+        if self._fh.closed:
+            return
+        self._resize(self._length)
+        self.flush()
+        self._fh.close()
+
+
+class ArraySignal(Signal):
+    '''
+    Signal saved by `ArrayWriter`
+
+    Indexing always applies to the time axis (i.e., the last axis). `Signal`
+    methods that extract segments or filter the signal require a single
+    channel. For multichannel arrays, use `channel` to get the signal for each
+    channel (this is a view of the memory-mapped file, so no data is copied).
+
+    Parameters
+    ----------
+    base_path : path
+        Path to signal, without the extension.
+    channel : {None, int}
+        Channel to load from a multichannel array. If None, all channels are
+        loaded.
+    '''
+
+    def __init__(self, base_path, channel=None):
+        self.base_path = Path(base_path)
+        self.channel_index = channel
+
+    @property
+    @functools.lru_cache()
+    def array(self):
+        array = np.load(self.base_path.with_suffix('.npy'), mmap_mode='r')
+        if self.channel_index is not None:
+            if array.ndim != 2:
+                raise ValueError(f'{self.base_path} has only one channel')
+            array = array[self.channel_index]
+        return array
+
+    @property
+    @functools.lru_cache()
+    def attrs(self):
+        with open(self.base_path.with_suffix('.json')) as fh:
+            return json.load(fh)
+
+    @property
+    def fs(self):
+        return self.attrs['fs']
+
+    @property
+    def duration(self):
+        return self.array.shape[-1]/self.fs
+
+    @property
+    def n_channels(self):
+        return self.array.shape[0] if self.array.ndim == 2 else 1
+
+    def channel(self, i):
+        '''
+        Return signal for channel i of a multichannel array
+        '''
+        return ArraySignal(self.base_path, i)
+
+    def _check_single_channel(self):
+        if self.array.ndim != 1:
+            raise ValueError(f'{self.base_path} has {self.n_channels} '
+                             'channels. Use `channel` to select one.')
+
+    def gather(self, indices, samples):
+        self._check_single_channel()
+        return super().gather(indices, samples)
+
+    def filter(self, filter_lb, filter_ub, filter_order=1):
+        self._check_single_channel()
+        return super().filter(filter_lb, filter_ub, filter_order)
+
+    def __getitem__(self, slice):
+        return self.array[..., slice]
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    def get_cache_file(self, name, *args):
+        if self.channel_index is not None:
+            args = (self.channel_index,) + args
+        return get_signal_cache_file(self.base_path.with_suffix('.npy'),
+                                     name, *args)
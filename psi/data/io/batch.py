@@ -0,0 +1,156 @@
+'''
+Utilities for processing a batch of experiments in parallel
+
+Analysis of each experiment (e.g., `summarize_abr.process_file`) is
+independent, so a batch can be split across a pool of processes. The outcome
+for each experiment is collected into a report rather than aborting the batch
+on the first failure.
+'''
+import logging
+log = logging.getLogger(__name__)
+
+from concurrent.futures import as_completed, ProcessPoolExecutor
+from contextlib import contextmanager
+import multiprocessing
+import os
+import time
+import traceback
+
+import pandas as pd
+
+
+@contextmanager
+def atomic_write(filename):
+    '''
+    Context manager that yields a temporary filename to write to
+
+    The temporary file is moved to `filename` once the block exits without
+    error, so readers (including checks for whether an experiment has already
+    been processed) never see a partially-written file.
+
+    Example
+    -------
+    >>> with atomic_write('average waveforms.csv') as tmp_filename:
+    ...     df.to_csv(tmp_filename)
+    '''
+    filename = str(filename)
+    root, ext = os.path.splitext(filename)
+    # Preserve the extension since some writers (e.g., `np.save`) use it to
+    # determine the format.
+    tmp_filename = f'{root}.{os.getpid()}.tmp{ext}'
+    try:
+        yield tmp_filename
+        os.replace(tmp_filename, filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+
+def _run(fn, filename, args, kwargs):
+    record = {
+        'filename': str(filename),
+        'status': None,
+        'error': '',
+        'traceback': '',
+        'pid': os.getpid(),
+    }
+    start = time.time()
+    try:
+        processed = fn(filename, *args, **kwargs)
+        record['status'] = 'processed' if processed else 'skipped'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f'{type(e).__name__}: {e}'
+        record['traceback'] = traceback.format_exc()
+    record['elapsed'] = time.time() - start
+    return record
+
+
+def print_progress(record):
+    '''
+    Print outcome of processing an experiment
+    '''
+    if record['status'] == 'processed':
+        print(f'\nProcessed {record["filename"]}\n')
+    elif record['status'] == 'error':
+        print(f'\nError processing {record["filename"]}\n{record["error"]}\n')
+    else:
+        print('*', end='', flush=True)
+
+
+def process_batch(fn, filenames, *args, workers=1, progress=print_progress,
+                  report=None, **kwargs):
+    '''
+    Call `fn(filename, *args, **kwargs)` for each filename
+
+    Parameters
+    ----------
+    fn : callable
+        Function that processes a single experiment. Must return True if the
+        experiment was processed and False if it was skipped (e.g., because it
+        was already processed). Must be importable from a module (i.e., not a
+        lambda or closure) so that it can be sent to the worker processes.
+    filenames : list of paths
+        Experiments to process.
+    workers : {None, int}
+        Number of processes to use. If 1, experiments are processed in the
+        current process. If None, use one process per CPU.
+    progress : {None, callable}
+        Called with the record for each experiment as soon as it is done.
+    report : {None, str, Path}
+        If provided, the report is also saved to this file in CSV format.
+    *args, **kwargs
+        Additional arguments passed to `fn`.
+
+    Returns
+    -------
+    report : DataFrame
+        One row per experiment (in the order of `filenames`) with the status
+        ('processed', 'skipped' or 'error'), error message and traceback (if
+        any), the ID of the process that handled it and the time taken (in
+        seconds).
+    '''
+    if workers is None:
+        workers = os.cpu_count()
+    workers = min(workers, len(filenames))
+
+    records = {}
+    if workers <= 1:
+        for filename in filenames:
+            records[filename] = _run(fn, filename, args, kwargs)
+            if progress is not None:
+                progress(records[filename])
+    else:
+        # Use spawn rather than fork since some libraries used by the analysis
+        # (e.g., BLAS) are not fork-safe.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, context) as executor:
+            futures = {executor.submit(_run, fn, f, args, kwargs): f \
+                       for f in filenames}
+            for future in as_completed(futures):
+                filename = futures[future]
+                records[filename] = future.result()
+                if progress is not None:
+                    progress(records[filename])
+
+    result = pd.DataFrame([records[f] for f in filenames],
+                          columns=['filename', 'status', 'error', 'traceback',
+                                   'pid', 'elapsed'])
+    counts = result['status'].value_counts()
+    log.info('Processed %d, skipped %d and failed %d experiments',
+             counts.get('processed', 0), counts.get('skipped', 0),
+             counts.get('error', 0))
+    if report is not None:
+        with atomic_write(report) as tmp_filename:
+            result.to_csv(tmp_filename, index=False)
+    return result
+
+
+def exit_status(report):
+    '''
+    Return exit status for a command-line program that processed a batch
+
+    Errors are collected in the report rather than raised, so the status is
+    nonzero if any experiment in the report failed.
+    '''
+    return int((report['status'] == 'error').any())
@@ -14,6 +14,7 @@ import pandas as pd
 from scipy import signal
 
 from . import Signal
+from .cache import get_signal_cache_file
 
 
 # Max size of LRU cache
@@ -60,6 +61,69 @@ def load_ctable_as_df(path, decode=True, archive=True):
     return df
 
 
+def get_ctable_names(path):
+    '''
+    Return names of columns in ctable
+
+    If the ctable has been archived to CSV (see `load_ctable_as_df`), the
+    names are read from the archive.
+    '''
+    csv_path = f'{path}.csv'
+    if os.path.exists(csv_path):
+        return pd.read_csv(csv_path, nrows=0).columns.tolist()
+    return list(bcolz.ctable(rootdir=path).names)
+
+
+def load_ctable_columns(path, names=None, rows=None, decode=True):
+    '''
+    Load selected columns and rows of a ctable as a DataFrame
+
+    Since ctables are stored by column, only the requested columns are read
+    from disk. As with `load_ctable_as_df`, the CSV archive is used if it
+    exists, so both return the same columns and dtypes.
+
+    Parameters
+    ----------
+    path : path
+        Path to ctable.
+    names : {None, list of str}
+        Columns to load. If None, load all columns.
+    rows : {None, array of int}
+        Rows to load. If None, load all rows. The index of the DataFrame is
+        set to the row numbers.
+    decode : bool
+        If True, decode byte strings to unicode.
+
+    Raises
+    ------
+    KeyError
+        If any of the columns are not in the ctable.
+    '''
+    all_names = get_ctable_names(path)
+    if names is None:
+        names = all_names
+    missing = [n for n in names if n not in all_names]
+    if missing:
+        # Check explicitly since bcolz treats unknown names as a query
+        # expression and raises a NameError.
+        raise KeyError(f'{missing} not in {path}')
+
+    csv_path = f'{path}.csv'
+    if os.path.exists(csv_path):
+        df = pd.read_csv(csv_path, usecols=names)[names]
+        return df if rows is None else df.iloc[rows]
+
+    table = bcolz.ctable(rootdir=path)
+    data = {}
+    for name in names:
+        column = table[name]
+        values = column[:] if rows is None else column[rows]
+        if decode and values.dtype.char == 'S':
+            values = np.char.decode(values, 'utf8')
+        data[name] = values
+    return pd.DataFrame(data, index=rows)
+
+
 class BcolzSignal(Signal):
 
     def __init__(self, base_path):
@@ -70,6 +134,10 @@ class BcolzSignal(Signal):
     def array(self):
         return bcolz.carray(rootdir=self.base_path)
 
+    @property
+    def chunk_samples(self):
+        return self.array.chunklen
+
     @property
     def fs(self):
         return self.array.attrs['fs']
@@ -81,6 +149,9 @@ class BcolzSignal(Signal):
     def __getitem__(self, slice):
         return self.array[slice]
 
+    def get_cache_file(self, name, *args):
+        return get_signal_cache_file(self.base_path, name, *args)
+
     @property
     def shape(self):
         return self.array.shape
@@ -0,0 +1,266 @@
+'''
+Persistent cache for analysis results computed from a recording
+
+Results are saved to the `cache` folder of the recording so that they can be
+reused across sessions. Each result is stored in a NPZ file named using a hash
+of the method name and its arguments. The file also contains a fingerprint
+(size and modification time) of the data the result was computed from. If the
+data changes, the fingerprint will no longer match and the result is
+recomputed.
+
+Only DataFrames (e.g., the epochs returned by `ABRFile.get_epochs`) can be
+cached. The values, columns and index are saved as plain arrays, so they can be
+loaded without unpickling.
+'''
+import logging
+log = logging.getLogger(__name__)
+
+from functools import wraps
+import inspect
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from psi.token.cache import content_key
+
+
+#: Name of the folder, relative to the recording, to store cached results in.
+CACHE_FOLDER = 'cache'
+
+#: Maximum size, in bytes, of the cached results for a recording. Once the
+#: cache exceeds this size, the least-recently used results are deleted.
+MAX_CACHE_SIZE = 2 * 1024**3
+
+#: Maximum size, in bytes, of the data derived from signals (e.g., filtered
+#: copies of the EEG) for a recording. This is separate from `MAX_CACHE_SIZE`
+#: since each file can be as large as the signal it was derived from.
+MAX_SIGNAL_CACHE_SIZE = 8 * 1024**3
+
+
+def get_fingerprint(path):
+    '''
+    Return number of files, total size and last modification time of path
+
+    If path is a folder (e.g., a Bcolz carray), all files in the folder are
+    included.
+    '''
+    n, size, mtime = 0, 0, 0
+    for root, dirs, files in os.walk(path):
+        for filename in files:
+            stat = os.stat(os.path.join(root, filename))
+            n += 1
+            size += stat.st_size
+            mtime = max(mtime, stat.st_mtime_ns)
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        n, size, mtime = 1, stat.st_size, stat.st_mtime_ns
+    return n, size, mtime
+
+
+def get_signal_cache_file(path, name, *args):
+    '''
+    Return filename to cache data derived from the signal saved at path
+
+    The filename includes a hash of args (e.g., filter settings) and the
+    fingerprint of the signal. Files derived from an earlier version of the
+    signal are removed. If the derived data for all signals in the recording
+    exceeds `MAX_SIGNAL_CACHE_SIZE`, the least-recently used files are removed.
+    Since the returned file has not been created yet, it is only counted
+    toward the budget on subsequent calls.
+    '''
+    path = Path(path)
+    cache_path = path.parent / CACHE_FOLDER
+    cache_path.mkdir(parents=True, exist_ok=True)
+    prefix = f'{path.name}-{name}-{content_key(args)[:16]}'
+    fingerprint = content_key(get_fingerprint(path))[:16]
+    filename = cache_path / f'{prefix}-{fingerprint}.npy'
+    for stale in cache_path.glob(f'{prefix}-*.npy'):
+        if stale != filename:
+            log.info('Removing stale cache file %s', stale)
+            stale.unlink()
+    if filename.exists():
+        # Mark as recently used.
+        os.utime(filename)
+    evict(cache_path, MAX_SIGNAL_CACHE_SIZE, '*.npy', exclude=[filename])
+    return filename
+
+
+def _to_array(values):
+    values = np.asarray(values)
+    if values.dtype.kind == 'O':
+        # Strings are stored as Python objects by pandas. Convert them to a
+        # fixed-width unicode array so they can be saved without pickling.
+        if not all(isinstance(v, str) for v in values):
+            raise TypeError('Unable to cache values of type object')
+        values = values.astype('U')
+    return values
+
+
+def save_dataframe(filename, df, **attrs):
+    '''
+    Save DataFrame to NPZ file
+
+    Additional keyword arguments are saved as strings and returned by
+    `load_dataframe`.
+    '''
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError('Only DataFrames can be cached')
+    index = df.index
+    data = {
+        'values': df.values,
+        'columns': _to_array(df.columns.values),
+        'columns_name': np.array(str(df.columns.name)),
+        'index_names': np.array([str(n) for n in index.names]),
+        'index_nlevels': np.array(index.nlevels),
+    }
+    for i in range(index.nlevels):
+        data[f'index_{i}'] = _to_array(index.get_level_values(i))
+    for k, v in attrs.items():
+        data[f'attr_{k}'] = np.array(str(v))
+
+    # Write to a temporary file and then move it into place so that an
+    # incomplete file is never loaded.
+    tmp_filename = f'{filename}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_filename, 'wb') as fh:
+            np.savez(fh, **data)
+        os.replace(tmp_filename, filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+
+def load_dataframe(filename):
+    '''
+    Load DataFrame saved by `save_dataframe`
+
+    Returns
+    -------
+    df : DataFrame
+        The DataFrame
+    attrs : dict
+        Additional attributes that were saved with the DataFrame.
+    '''
+    with np.load(filename, allow_pickle=False) as fh:
+        nlevels = int(fh['index_nlevels'])
+        names = [None if n == 'None' else n for n in fh['index_names']]
+        levels = [fh[f'index_{i}'] for i in range(nlevels)]
+        if nlevels == 1:
+            index = pd.Index(levels[0], name=names[0])
+        else:
+            index = pd.MultiIndex.from_arrays(levels, names=names)
+        columns_name = str(fh['columns_name'])
+        columns = pd.Index(fh['columns'],
+                           name=None if columns_name == 'None' else columns_name)
+        df = pd.DataFrame(fh['values'], index=index, columns=columns)
+        attrs = {k[5:]: str(fh[k]) for k in fh.files if k.startswith('attr_')}
+    return df, attrs
+
+
+def evict(folder, max_size, pattern='*.npz', exclude=None):
+    '''
+    Delete least-recently used files in folder until the total size of files
+    matching pattern is less than max_size
+
+    Files listed in exclude count toward the total but are never deleted.
+    '''
+    exclude = set() if exclude is None else set(exclude)
+    files = []
+    for path in folder.glob(pattern):
+        if path in exclude:
+            continue
+        try:
+            stat = path.stat()
+            files.append((stat.st_mtime_ns, stat.st_size, path))
+        except FileNotFoundError:
+            pass
+    total = sum(f[1] for f in files)
+    total += sum(p.stat().st_size for p in exclude if p.exists())
+    for _, size, path in sorted(files):
+        if total <= max_size:
+            break
+        log.debug('Evicting %s from cache', path)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # On Windows, files that are memory-mapped cannot be deleted.
+            log.warning('Unable to evict %s from cache: %s', path, e)
+            continue
+        total -= size
+
+
+def cache(f=None, name=None, max_size=None):
+    '''
+    Decorator that caches the result of a Recording method to disk
+
+    The fingerprint of each item listed in the `_cache_sources` attribute of
+    the recording (e.g., `['eeg', 'erp_metadata']`) is checked each time the
+    cached result is loaded. The wrapped method accepts an additional keyword
+    argument, `refresh_cache`. If True, the result is recomputed even if it is
+    in the cache.
+
+    Parameters
+    ----------
+    name : {None, str}
+        Name used for the cache files. Defaults to the name of the method.
+    max_size : {None, int}
+        Maximum size, in bytes, of the cache folder. If None, defaults to
+        `MAX_CACHE_SIZE`.
+    '''
+    if f is None:
+        return lambda f: cache(f, name, max_size)
+
+    s = inspect.signature(f)
+    if name is None:
+        name = f.__code__.co_name
+
+    @wraps(f)
+    def wrapper(self, *args, refresh_cache=False, **kwargs):
+        bound_args = s.bind(self, *args, **kwargs)
+        bound_args.apply_defaults()
+        cache_kwargs = dict(bound_args.arguments)
+        cache_kwargs.pop('self')
+        # Results for recordings limited by `Recording.select` must be cached
+        # separately. Key on the selected rows rather than the predicates
+        # since chained selections can share predicates but not rows.
+        selection = getattr(self, '_selection', None)
+        if selection is not None:
+            cache_kwargs['selection'] = content_key(np.asarray(selection))
+        description = repr(sorted(cache_kwargs.items()))
+
+        sources = getattr(self, '_cache_sources', [])
+        fingerprint = repr([get_fingerprint(self.base_path / s) \
+                            for s in sources])
+
+        cache_path = self.base_path / CACHE_FOLDER
+        cache_path.mkdir(parents=True, exist_ok=True)
+        cache_file = cache_path / f'{name}-{content_key(name, cache_kwargs)}.npz'
+
+        if not refresh_cache and cache_file.exists():
+            try:
+                result, attrs = load_dataframe(cache_file)
+                if attrs['kwargs'] != description:
+                    raise ValueError('Cache is corrupted')
+                if attrs['fingerprint'] == fingerprint:
+                    # Mark as recently used.
+                    os.utime(cache_file)
+                    return result
+                log.debug('Source data for %s changed', cache_file)
+            except Exception as e:
+                log.warning('Unable to load cached result %s: %s', cache_file,
+                            e)
+
+        result = f(self, *args, **kwargs)
+        try:
+            save_dataframe(cache_file, result, kwargs=description,
+                           fingerprint=fingerprint)
+            evict(cache_path, MAX_CACHE_SIZE if max_size is None else max_size)
+        except Exception as e:
+            log.warning('Unable to cache result %s: %s', cache_file, e)
+        return result
+
+    return wrapper
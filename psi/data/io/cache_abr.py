@@ -1,31 +1,29 @@
 import argparse
 from glob import glob
 import os.path
+import sys
 
 import numpy as np
 
 from psi.data.io import abr
+from psi.data.io.batch import exit_status, process_batch
+from psi.data.io.summarize_abr import add_batch_arguments
+from psi.data.io.summary import save_series, save_waveforms
 
 
-def process_folder(folder, filter_settings=None):
+def process_folder(folder, filter_settings=None, workers=1, report=None):
     glob_pattern = os.path.join(folder, '*abr')
     filenames = glob(glob_pattern)
-    process_files(filenames, filter_settings=filter_settings)
+    return process_files(filenames, filter_settings=filter_settings,
+                         workers=workers, report=report)
 
 
 def process_files(filenames, offset=-0.001, duration=0.01,
-                  filter_settings=None, reprocess=False):
-    for filename in filenames:
-        try:
-            processed = process_file(filename, offset, duration,
-                                     filter_settings, reprocess)
-            if processed:
-                print(f'\nProcessed {filename}\n')
-            else:
-                print('.', end='', flush=True)
-        except Exception as e:
-            print(f'\nError processing {filename}\n{e}\n')
-            raise
+                  filter_settings=None, reprocess=False, workers=1,
+                  report=None):
+    return process_batch(process_file, filenames, offset, duration,
+                         filter_settings, reprocess, workers=workers,
+                         report=report)
 
 
 def _get_file_template(fh, offset, duration, filter_settings):
@@ -133,21 +131,24 @@ def process_file(filename, offset, duration, filter_settings, reprocess=False):
 
     # Write the data to CSV files
     epoch_reject_ratio.name = 'epoch_reject_ratio'
-    epoch_reject_ratio.to_csv(reject_ratio_file, header=True)
+    save_series(epoch_reject_ratio, reject_ratio_file)
     epoch_reject_ratio.name = 'epoch_n'
-    epoch_n.to_csv(n_epoch_file, header=True)
+    save_series(epoch_n, n_epoch_file)
     epoch_mean.columns.name = 'time'
-    epoch_mean.T.to_csv(mean_epoch_file)
+    save_waveforms(epoch_mean, mean_epoch_file)
     epochs.columns.name = 'time'
-    epochs.T.to_csv(raw_epoch_file)
+    save_waveforms(epochs, raw_epoch_file)
     return True
 
 
 def main_auto():
     parser = argparse.ArgumentParser('Filter and summarize ABR files in folder')
     parser.add_argument('folder', type=str, help='Folder containing ABR data')
+    add_batch_arguments(parser)
     args = parser.parse_args()
-    process_folder(args.folder, filter_settings='saved')
+    report = process_folder(args.folder, filter_settings='saved',
+                            workers=args.workers or None, report=args.report)
+    sys.exit(exit_status(report))
 
 
 def main():
@@ -170,6 +171,7 @@ def main():
     parser.add_argument('--reprocess',
                         help='Redo existing results',
                         action='store_true')
+    add_batch_arguments(parser)
     args = parser.parse_args()
 
     if args.filter_lb is not None or args.filter_ub is not None:
@@ -179,8 +181,10 @@ def main():
         }
     else:
         filter_settings = None
-    process_files(args.filenames, args.offset, args.duration, filter_settings,
-                  args.reprocess)
+    report = process_files(args.filenames, args.offset, args.duration,
+                           filter_settings, args.reprocess,
+                           workers=args.workers or None, report=args.report)
+    sys.exit(exit_status(report))
 
 
 if __name__ == '__main__':
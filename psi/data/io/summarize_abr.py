@@ -1,38 +1,72 @@
 import argparse
 from glob import glob
 import os.path
+import sys
 
 import numpy as np
 import pandas as pd
 
 from psi.data.io import abr
+from psi.data.io.batch import exit_status, process_batch
+from psi.data.io.summary import FORMATS, save_series, save_waveforms
 
 
 columns = ['frequency', 'level', 'polarity']
 
 
-def process_folder(folder, filter_settings=None):
+#: Name of each result saved by `process_file`.
+RESULT_NAMES = [
+    'individual waveforms',
+    'average waveforms',
+    'number of epochs',
+    'reject ratio',
+]
+
+
+def process_folder(folder, filter_settings=None, workers=1, report=None,
+                   output_format='csv'):
     glob_pattern = os.path.join(folder, '*abr*')
     filenames = glob(glob_pattern)
-    process_files(filenames, filter_settings=filter_settings)
+    return process_files(filenames, filter_settings=filter_settings,
+                         workers=workers, report=report,
+                         output_format=output_format)
 
 
 def process_files(filenames, offset=-0.001, duration=0.01,
-                  filter_settings=None, reprocess=False):
-    for filename in filenames:
-        try:
-            processed = process_file(filename, offset, duration,
-                                     filter_settings, reprocess)
-            if processed:
-                print(f'\nProcessed {filename}\n')
-            else:
-                print('*', end='', flush=True)
-        except Exception as e:
-            raise
-            print(f'\nError processing {filename}\n{e}\n')
-
-
-def _get_file_template(fh, offset, duration, filter_settings, suffix=None):
+                  filter_settings=None, reprocess=False, n_epochs='auto',
+                  suffix=None, workers=1, report=None, output_format='csv'):
+    '''
+    Process a batch of ABR experiments
+
+    Experiments that have already been processed are skipped (by
+    `process_file`, so the check runs in the worker processes) unless
+    `reprocess` is True. Errors are reported rather than aborting the batch.
+
+    Parameters
+    ----------
+    filenames : list of paths
+        ABR experiments to process.
+    workers : {None, int}
+        Number of processes to use. If None, use one process per CPU.
+    report : {None, path}
+        If provided, save the report to this file in CSV format.
+
+    See `process_file` for the remaining parameters.
+
+    Returns
+    -------
+    report : DataFrame
+        Status of each experiment. See `psi.data.io.batch.process_batch`.
+    '''
+    return process_batch(process_file, filenames, offset, duration,
+                         filter_settings, reprocess=reprocess,
+                         n_epochs=n_epochs, suffix=suffix,
+                         output_format=output_format, workers=workers,
+                         report=report)
+
+
+def _get_file_template(fh, offset, duration, filter_settings, suffix=None,
+                       output_format='csv'):
     base_string = f'ABR {offset*1e3:.1f}ms to {(offset+duration)*1e3:.1f}ms'
     if filter_settings == 'saved':
         settings = _get_filter(fh)
@@ -48,7 +82,7 @@ def _get_file_template(fh, offset, duration, filter_settings, suffix=None):
         lb = filter_settings['lb']
         ub = filter_settings['ub']
         filter_string = f'{lb:.0f}Hz to {ub:.0f}Hz filter'
-        order = filter_settings['order']
+        order = filter_settings.get('order', 1)
         if order != 1:
             filter_string = f'{order:.0f} order {filter_string}'
 
@@ -61,7 +95,7 @@ def _get_file_template(fh, offset, duration, filter_settings, suffix=None):
         file_string = f'{file_string} {suffix}'
 
     print(file_string)
-    return f'{file_string} {{}}.csv'
+    return f'{file_string} {{}}{FORMATS[output_format]}'
 
 
 def _get_filter(fh):
@@ -96,7 +130,7 @@ def _get_epochs(fh, offset, duration, filter_settings, reject_ratio=None):
         return fh.get_epochs_filtered(**kwargs)
     lb = filter_settings['lb']
     ub = filter_settings['ub']
-    order = filter_settings['order']
+    order = filter_settings.get('order', 1)
     kwargs.update({'filter_lb': lb, 'filter_ub': ub, 'filter_order': order})
     return fh.get_epochs_filtered(**kwargs)
 
@@ -117,19 +151,25 @@ def _match_epochs(*epochs):
               matched.groupby('dataset', group_keys=False)]
 
 
-def is_processed(filename, offset, duration, filter_settings, suffix=None):
-    t = _get_file_template(filename, offset, duration, filter_settings, suffix)
+def _get_result_files(filename, offset, duration, filter_settings,
+                      suffix=None, output_format='csv', fh=None):
+    if fh is None:
+        fh = filename
+    t = _get_file_template(fh, offset, duration, filter_settings, suffix,
+                           output_format)
     file_template = os.path.join(filename, t)
-    raw_epoch_file = file_template.format('individual waveforms')
-    mean_epoch_file = file_template.format('average waveforms')
-    n_epoch_file = file_template.format('number of epochs')
-    return os.path.exists(raw_epoch_file) and \
-        os.path.exists(mean_epoch_file) and \
-        os.path.exists(n_epoch_file)
+    return {n: file_template.format(n) for n in RESULT_NAMES}
+
+
+def is_processed(filename, offset, duration, filter_settings, suffix=None,
+                 output_format='csv'):
+    result_files = _get_result_files(filename, offset, duration,
+                                     filter_settings, suffix, output_format)
+    return all(os.path.exists(f) for f in result_files.values())
 
 
 def process_files_matched(filenames, offset, duration, filter_settings,
-                          reprocess=True, suffix=None):
+                          reprocess=True, suffix=None, output_format='csv'):
     epochs = []
     for filename in filenames:
         fh = abr.load(filename)
@@ -141,7 +181,8 @@ def process_files_matched(filenames, offset, duration, filter_settings,
     epochs = _match_epochs(*epochs)
     for filename, e in zip(filenames, epochs):
         # Generate the filenames
-        t = _get_file_template(fh, offset, duration, filter_settings, suffix)
+        t = _get_file_template(fh, offset, duration, filter_settings, suffix,
+                               output_format)
         file_template = os.path.join(filename, t)
         raw_epoch_file = file_template.format('individual waveforms')
         mean_epoch_file = file_template.format('average waveforms')
@@ -157,18 +198,17 @@ def process_files_matched(filenames, offset, duration, filter_settings,
         epoch_n = e.groupby(columns[:-1]).size()
         epoch_mean = e.groupby(columns).mean().groupby(columns[:-1]).mean()
 
-        # Write the data to CSV files
-        epoch_n.to_csv(n_epoch_file, header=True)
-        epoch_mean.columns.name = 'time'
-        epoch_mean.T.to_csv(mean_epoch_file)
-        e.columns.name = 'time'
-        e.T.to_csv(raw_epoch_file)
+        # Write the data to files
+        epoch_n.name = 'epoch_n'
+        save_series(epoch_n, n_epoch_file)
+        save_waveforms(epoch_mean, mean_epoch_file)
+        save_waveforms(e, raw_epoch_file)
 
 
 def process_file(filename, offset, duration, filter_settings, reprocess=False,
-                 n_epochs='auto', suffix=None):
+                 n_epochs='auto', suffix=None, output_format='csv'):
     '''
-    Extract ABR epochs, filter and save result to CSV files
+    Extract ABR epochs, filter and save result to files
 
     Parameters
     ----------
@@ -199,25 +239,26 @@ def process_file(filename, offset, duration, filter_settings, reprocess=False,
         use.
     suffix : {None, str}
         Suffix to use when creating save filenames.
+    output_format : {'csv', 'npz'}
+        Format to save results in. NPZ files are much faster to read and write.
+        Use the loaders in `psi.data.io.summary` to read results in either
+        format.
     '''
     fh = abr.load(filename)
     if len(fh.erp_metadata) == 0:
         raise IOError('No data in file')
 
     # Generate the filenames
-    t = _get_file_template(fh, offset, duration, filter_settings, suffix)
-    file_template = os.path.join(filename, t)
-    raw_epoch_file = file_template.format('individual waveforms')
-    mean_epoch_file = file_template.format('average waveforms')
-    n_epoch_file = file_template.format('number of epochs')
-    reject_ratio_file = file_template.format('reject ratio')
+    result_files = _get_result_files(filename, offset, duration,
+                                     filter_settings, suffix, output_format,
+                                     fh)
+    raw_epoch_file = result_files['individual waveforms']
+    mean_epoch_file = result_files['average waveforms']
+    n_epoch_file = result_files['number of epochs']
+    reject_ratio_file = result_files['reject ratio']
 
     # Check to see if all of them exist before reprocessing
-    if not reprocess and \
-            (os.path.exists(raw_epoch_file) and \
-             os.path.exists(mean_epoch_file) and \
-             os.path.exists(n_epoch_file) and \
-             os.path.exists(reject_ratio_file)):
+    if not reprocess and all(os.path.exists(f) for f in result_files.values()):
         return False
 
     # Load the epochs
@@ -240,24 +281,28 @@ def process_file(filename, offset, duration, filter_settings, reprocess=False,
     epoch_mean = epochs.groupby(columns).mean() \
         .groupby(columns[:-1]).mean()
 
-    # Write the data to CSV files
+    # Write the data to files. Each file is written atomically so that an
+    # interrupted run is detected by `is_processed`.
     epoch_reject_ratio.name = 'epoch_reject_ratio'
-    epoch_reject_ratio.to_csv(reject_ratio_file, header=True)
-    epoch_reject_ratio.name = 'epoch_n'
+    save_series(epoch_reject_ratio, reject_ratio_file)
     epoch_n = epochs.groupby(columns[:-1]).size()
-    epoch_n.to_csv(n_epoch_file, header=True)
-    epoch_mean.columns.name = 'time'
-    epoch_mean.T.to_csv(mean_epoch_file)
-    epochs.columns.name = 'time'
-    epochs.T.to_csv(raw_epoch_file)
+    epoch_n.name = 'epoch_n'
+    save_series(epoch_n, n_epoch_file)
+    save_waveforms(epoch_mean, mean_epoch_file)
+    save_waveforms(epochs, raw_epoch_file)
     return True
 
 
 def main_auto():
     parser = argparse.ArgumentParser('Filter and summarize ABR files in folder')
     parser.add_argument('folder', type=str, help='Folder containing ABR data')
+    add_batch_arguments(parser)
+    add_format_argument(parser)
     args = parser.parse_args()
-    process_folder(args.folder, filter_settings='saved')
+    report = process_folder(args.folder, filter_settings='saved',
+                            workers=args.workers or None, report=args.report,
+                            output_format=args.format)
+    sys.exit(exit_status(report))
 
 
 def main():
@@ -277,12 +322,14 @@ def main():
     parser.add_argument('--filter-ub', type=float,
                         help='Lowpass filter cutoff',
                         default=None)
-    parser.add_argument('--order', type=float,
+    parser.add_argument('--order', type=int,
                         help='Filter order',
-                        default=None)
+                        default=1)
     parser.add_argument('--reprocess',
                         help='Redo existing results',
                         action='store_true')
+    add_batch_arguments(parser)
+    add_format_argument(parser)
     args = parser.parse_args()
 
     if args.filter_lb is not None or args.filter_ub is not None:
@@ -293,8 +340,25 @@ def main():
         }
     else:
         filter_settings = None
-    process_files(args.filenames, args.offset, args.duration, filter_settings,
-                  args.reprocess)
+    report = process_files(args.filenames, args.offset, args.duration,
+                           filter_settings, args.reprocess,
+                           workers=args.workers or None, report=args.report,
+                           output_format=args.format)
+    sys.exit(exit_status(report))
+
+
+def add_format_argument(parser):
+    parser.add_argument('--format', type=str, choices=list(FORMATS),
+                        help='Format to save results in', default='csv')
+
+
+def add_batch_arguments(parser):
+    parser.add_argument('-j', '--workers', type=int,
+                        help='Number of processes to use (0 for one per CPU)',
+                        default=1)
+    parser.add_argument('--report', type=str,
+                        help='Save report of processed experiments to CSV file',
+                        default=None)
 
 
 def main_gui():
@@ -0,0 +1,111 @@
+'''
+Reading and writing results generated by `summarize_abr`
+
+Results can be saved in CSV format (the default, which is easy to inspect
+and load into other programs) or in NPZ format, which is much faster to read
+and write and smaller on disk. The format is determined by the file extension,
+so loaders can read either format transparently.
+
+Waveforms (e.g., individual and average waveforms) are DataFrames with one
+row per waveform and one column per time point. In CSV format, they are saved
+transposed (i.e., one column per waveform) for compatibility with existing
+analysis tools. The loaders always return one row per waveform.
+'''
+import os.path
+
+import pandas as pd
+
+from .batch import atomic_write
+from .cache import load_dataframe, save_dataframe
+
+
+#: Mapping of output format to file extension.
+FORMATS = {
+    'csv': '.csv',
+    'npz': '.npz',
+}
+
+
+def _get_format(filename):
+    ext = os.path.splitext(str(filename))[1].lower()
+    for output_format, format_ext in FORMATS.items():
+        if ext == format_ext:
+            return output_format
+    raise ValueError(f'Unsupported file format {ext}')
+
+
+def _to_numeric(values):
+    try:
+        return pd.to_numeric(values)
+    except (ValueError, TypeError):
+        return values
+
+
+def save_waveforms(waveforms, filename):
+    '''
+    Save waveforms (one row per waveform) to file
+    '''
+    output_format = _get_format(filename)
+    with atomic_write(filename) as tmp_filename:
+        if output_format == 'csv':
+            waveforms = waveforms.copy(deep=False)
+            waveforms.columns.name = 'time'
+            waveforms.T.to_csv(tmp_filename)
+        else:
+            save_dataframe(tmp_filename, waveforms)
+
+
+def load_waveforms(filename):
+    '''
+    Load waveforms saved by `save_waveforms`
+
+    Returns
+    -------
+    waveforms : DataFrame
+        One row per waveform. The index contains the parameters for each
+        waveform (e.g., frequency and level) and the columns are time.
+    '''
+    if _get_format(filename) == 'npz':
+        return load_dataframe(filename)[0]
+
+    # The CSV file has one header row per index level followed by a row
+    # containing the name of the time column.
+    with open(filename) as fh:
+        for n_header, line in enumerate(fh):
+            if line.split(',', 1)[0] == 'time':
+                break
+    # If there is only one index level, there are no header rows and the name
+    # of the index level is not saved.
+    header = list(range(n_header)) if n_header else 0
+    df = pd.read_csv(filename, header=header, index_col=0)
+    df = df.T
+    if df.index.nlevels == 1:
+        df.index = pd.Index(_to_numeric(df.index), name=df.index.name)
+    else:
+        levels = [_to_numeric(df.index.get_level_values(i)) \
+                  for i in range(df.index.nlevels)]
+        df.index = pd.MultiIndex.from_arrays(levels, names=df.index.names)
+    df.columns = pd.Index(df.columns.values.astype(float), name='time')
+    return df
+
+
+def save_series(series, filename):
+    '''
+    Save Series (e.g., number of epochs per frequency and level) to file
+    '''
+    output_format = _get_format(filename)
+    with atomic_write(filename) as tmp_filename:
+        if output_format == 'csv':
+            series.to_csv(tmp_filename, header=True)
+        else:
+            save_dataframe(tmp_filename, series.to_frame())
+
+
+def load_series(filename):
+    '''
+    Load Series saved by `save_series`
+    '''
+    if _get_format(filename) == 'npz':
+        return load_dataframe(filename)[0].iloc[:, 0]
+    df = pd.read_csv(filename)
+    return df.set_index(list(df.columns[:-1]))[df.columns[-1]]
@@ -1,6 +1,7 @@
 import enaml
 
 with enaml.imports():
+    from .array_store import ArrayStore
     from .bcolz_store import BColzStore
     from .display_value import DisplayValue
     from .event_log import EventLog
@@ -0,0 +1,173 @@
+'''
+Memory-mapped banks of pre-rendered waveforms
+
+Waveforms that are expensive to generate but fully determined by their
+parameters (e.g., frozen noise) can be rendered once and saved to the cache
+folder as a NPY file. The file is named using a hash of the parameters so that
+it can be reused across trials and sessions. Banks are memory-mapped read-only,
+so only the portions that are actually played are loaded from disk.
+'''
+import logging
+log = logging.getLogger(__name__)
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import threading
+
+import numpy as np
+
+from psi import get_cache_folder
+from .cache import content_key
+
+
+#: Version of the bank format and synthesis. This is included in the key of
+#: every bank, so incrementing it invalidates banks rendered by earlier
+#: versions (e.g., when the implementation of a token changes but its
+#: parameters do not).
+BANK_VERSION = 1
+
+
+def factory_id(factory):
+    '''
+    Return the fully-qualified class name of factory for use in bank keys
+    '''
+    cls = type(factory)
+    return f'{cls.__module__}.{cls.__qualname__}'
+
+
+class WaveformBank:
+    '''
+    Folder of memory-mapped waveforms keyed by the parameters that define them
+
+    Parameters
+    ----------
+    name : str
+        Name of the subfolder in the cache folder to store the waveforms in.
+    folder : {None, str, Path}
+        Folder to store the waveforms in. If provided, `name` is ignored.
+    '''
+
+    def __init__(self, name, folder=None):
+        self._name = name
+        self._folder = folder
+        self._arrays = {}
+        self._lock = threading.Lock()
+
+    def get_folder(self):
+        if self._folder is None:
+            return get_cache_folder(self._name)
+        os.makedirs(self._folder, exist_ok=True)
+        return self._folder
+
+    def get(self, key, shape, render, dtype=np.double):
+        '''
+        Return read-only memory-mapped array, rendering it if needed
+
+        Parameters
+        ----------
+        key : tuple
+            Parameters that fully define the waveform (see `content_key`).
+            This should include the class of the factory that renders it (see
+            `factory_id`). `BANK_VERSION` is added automatically.
+        shape : {int, tuple}
+            Shape of the array.
+        render : callable
+            Called with a writable array of the requested shape and dtype
+            which it must fill in.
+        dtype : numpy dtype
+            Datatype of the array.
+        '''
+        if np.isscalar(shape):
+            shape = (int(shape),)
+        key = content_key(BANK_VERSION, key, shape, str(np.dtype(dtype)))
+        filename = os.path.join(str(self.get_folder()), key + '.npy')
+        with self._lock:
+            if filename in self._arrays:
+                return self._arrays[filename]
+            if not os.path.exists(filename):
+                self._render(filename, shape, render, dtype)
+            array = np.load(filename, mmap_mode='r')
+            self._arrays[filename] = array
+            return array
+
+    def _render(self, filename, shape, render, dtype):
+        log.info('Rendering waveform bank %s', filename)
+        # Render to a temporary file and then move it into place so that an
+        # incomplete bank is never loaded (e.g., if rendering fails or another
+        # process is reading from the same folder).
+        tmp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+        try:
+            array = np.lib.format.open_memmap(tmp_filename, mode='w+',
+                                              dtype=dtype, shape=shape)
+            render(array)
+            array.flush()
+            del array
+            os.replace(tmp_filename, filename)
+        finally:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+
+    def clear(self):
+        '''
+        Release memory-mapped arrays opened by this bank
+        '''
+        with self._lock:
+            self._arrays.clear()
+
+
+def _init_render_worker():
+    # Factories are defined in Enaml files, so the importer must be installed
+    # before they can be unpickled.
+    import enaml
+    with enaml.imports():
+        import psi.token.primitives
+
+
+def _render_to_file(factory, filename, lb, samples):
+    out = np.load(filename, mmap_mode='r+')
+    factory.reset()
+    factory.next(samples, out=out[lb:lb+samples])
+    out.flush()
+
+
+def render_waveforms(jobs, out, max_workers=None):
+    '''
+    Render waveforms from factories into an array
+
+    Parameters
+    ----------
+    jobs : list of (factory, lb, samples)
+        Each factory is reset and `samples` samples are rendered into
+        `out[lb:lb+samples]`.
+    out : array
+        Array to render into. If this is a memory-mapped NPY file (e.g., as
+        provided by `WaveformBank.get` to the render function) and there is
+        more than one job, the waveforms are rendered in parallel by a pool
+        of processes that write directly to the file.
+    max_workers : {None, int}
+        Maximum number of processes. If None, defaults to the number of CPUs.
+        If 1, waveforms are rendered in the current process.
+    '''
+    filename = getattr(out, 'filename', None)
+    if filename is not None and len(jobs) > 1 and max_workers != 1:
+        # Use spawn rather than fork since we are likely running inside a GUI
+        # application with several threads.
+        context = multiprocessing.get_context('spawn')
+        try:
+            with ProcessPoolExecutor(max_workers, context,
+                                     _init_render_worker) as executor:
+                futures = [executor.submit(_render_to_file, factory, filename,
+                                           lb, samples) \
+                           for factory, lb, samples in jobs]
+                for future in futures:
+                    future.result()
+            return out
+        except Exception as e:
+            log.warning('Unable to render waveforms in parallel (%s). '
+                        'Rendering in current process.', e)
+
+    for factory, lb, samples in jobs:
+        factory.reset()
+        factory.next(samples, out=out[lb:lb+samples])
+    return out
@@ -0,0 +1,195 @@
+'''
+Memoization of waveform and filter calculations used by the token factories
+'''
+import logging
+log = logging.getLogger(__name__)
+
+from collections import namedtuple, OrderedDict
+from functools import wraps
+import hashlib
+import os
+import pickle
+import threading
+
+import numpy as np
+from atom.api import Atom
+
+from psi import get_cache_folder, get_config
+from psi.util import get_tagged_values
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses disk_hits maxsize currsize')
+
+
+#: Functions wrapped by `fast_cache`, used by `get_cache_info` and
+#: `clear_caches`.
+CACHED_FUNCTIONS = []
+
+
+def _update_hash(h, value):
+    if isinstance(value, np.ndarray):
+        h.update(b'ndarray')
+        h.update(str(value.dtype).encode())
+        h.update(str(value.shape).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, Atom):
+        # Objects such as calibrations are recreated each time they are loaded,
+        # so hash the values that define them rather than their identity.
+        h.update(value.__class__.__name__.encode())
+        _update_hash(h, get_tagged_values(value, 'metadata'))
+    elif isinstance(value, dict):
+        h.update(b'dict')
+        for k in sorted(value, key=str):
+            _update_hash(h, k)
+            _update_hash(h, value[k])
+    elif isinstance(value, (list, tuple)):
+        h.update(type(value).__name__.encode())
+        for v in value:
+            _update_hash(h, v)
+    else:
+        h.update(type(value).__name__.encode())
+        h.update(repr(value).encode())
+
+
+def content_key(*args):
+    '''
+    Return a hash of the arguments that does not depend on object identity
+
+    Arrays are hashed by content and Atom objects (e.g., calibrations) by the
+    values of their members tagged as metadata.
+    '''
+    h = hashlib.sha1()
+    for arg in args:
+        _update_hash(h, arg)
+    return h.hexdigest()
+
+
+def _key_value(value):
+    # Scalars are used as-is since hashing them is much faster. Arrays are not
+    # hashable and Atom objects (e.g., calibrations) hash by identity, so they
+    # are replaced by a hash of their content.
+    if isinstance(value, (Atom, np.ndarray)):
+        return content_key(value)
+    return value
+
+
+class _KwdMarker:
+    # Separates positional and keyword arguments in the key. The repr must be
+    # stable across sessions since it is used for the persistent cache.
+    def __repr__(self):
+        return '<kwd_marker>'
+
+
+def persist_enabled():
+    try:
+        return get_config('PERSIST_TOKEN_CACHE')
+    except (AttributeError, SystemError):
+        return False
+
+
+def fast_cache(f=None, maxsize=256, persist=False):
+    '''
+    Decorator that caches the result of a function
+
+    The least-recently used result is discarded once `maxsize` results are
+    cached. Calibration objects passed as arguments are keyed by their content
+    rather than identity, so results are reused when the same calibration is
+    reloaded.
+
+    If `persist` is True and the PERSIST_TOKEN_CACHE setting is enabled,
+    results are also pickled to the cache folder so that they can be reused
+    across sessions. This is intended for expensive calculations (e.g., filter
+    design) rather than functions that are called on every chunk.
+
+    The wrapped function has `cache_info` and `cache_clear` methods similar to
+    those provided by `functools.lru_cache`.
+    '''
+    if f is None:
+        return lambda f: fast_cache(f, maxsize, persist)
+
+    cache = OrderedDict()
+    lock = threading.Lock()
+    stats = {'hits': 0, 'misses': 0, 'disk_hits': 0}
+    kwd_marker = _KwdMarker()
+    name = '{}.{}'.format(f.__module__, f.__qualname__)
+
+    def load(key):
+        filename = get_cache_folder('token') / (content_key(name, key) + '.pkl')
+        if filename.exists():
+            try:
+                with filename.open('rb') as fh:
+                    return True, pickle.load(fh)
+            except Exception as e:
+                log.warning('Unable to load cached result %s: %s', filename, e)
+        return False, filename
+
+    def save(filename, result):
+        tmp_filename = filename.with_suffix('.{}.tmp'.format(os.getpid()))
+        try:
+            with tmp_filename.open('wb') as fh:
+                pickle.dump(result, fh)
+            os.replace(tmp_filename, filename)
+        except Exception as e:
+            log.warning('Unable to save cached result %s: %s', filename, e)
+            if tmp_filename.exists():
+                tmp_filename.unlink()
+
+    @wraps(f)
+    def wrapper(*args, **kw):
+        key = tuple(_key_value(a) for a in args)
+        if kw:
+            key += (kwd_marker,) + \
+                tuple((k, _key_value(v)) for k, v in sorted(kw.items()))
+        with lock:
+            try:
+                result = cache[key]
+                cache.move_to_end(key)
+                stats['hits'] += 1
+                return result
+            except KeyError:
+                pass
+
+        if persist and persist_enabled():
+            found, value = load(key)
+            if found:
+                result, stat = value, 'disk_hits'
+            else:
+                result, stat = f(*args, **kw), 'misses'
+                save(value, result)
+        else:
+            result, stat = f(*args, **kw), 'misses'
+
+        with lock:
+            stats[stat] += 1
+            cache[key] = result
+            while len(cache) > maxsize:
+                cache.popitem(last=False)
+        return result
+
+    def cache_info():
+        with lock:
+            return CacheInfo(stats['hits'], stats['misses'],
+                             stats['disk_hits'], maxsize, len(cache))
+
+    def cache_clear():
+        with lock:
+            cache.clear()
+            stats.update({'hits': 0, 'misses': 0, 'disk_hits': 0})
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    CACHED_FUNCTIONS.append(wrapper)
+    return wrapper
+
+
+def get_cache_info():
+    '''
+    Return dictionary mapping name of each cached function to its statistics
+    '''
+    return {'{}.{}'.format(f.__module__, f.__qualname__): f.cache_info() \
+            for f in CACHED_FUNCTIONS}
+
+
+def clear_caches():
+    for f in CACHED_FUNCTIONS:
+        f.cache_clear()
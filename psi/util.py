@@ -3,6 +3,7 @@ log = logging.getLogger(__name__)
 
 import ast
 import inspect
+import sys
 import threading
 
 import numpy as np
@@ -235,6 +236,68 @@ class SignalBuffer:
             return self._samples
 
 
+class BufferPool:
+    '''
+    Pool of preallocated arrays that are recycled between reads
+
+    Hardware callbacks read data at a steady rate into a freshly-allocated
+    array. The pool hands out views onto a small set of preallocated buffers
+    instead. A buffer is only handed out again once nothing outside of the
+    pool holds a reference to it (or to a view onto it). Consumers that retain
+    the data (e.g., to buffer it for retroactive epoch extraction) therefore
+    keep the buffer alive, and the pool allocates a replacement rather than
+    overwriting data that is still in use.
+
+    Parameters
+    ----------
+    dtype : numpy dtype
+        Datatype of the buffers.
+    n_buffers : int
+        Maximum number of buffers to keep in the pool.
+    '''
+
+    def __init__(self, dtype=np.double, n_buffers=4):
+        self._dtype = np.dtype(dtype)
+        self._n_buffers = n_buffers
+        self._buffers = []
+        self._lock = threading.Lock()
+        self.allocations = 0
+
+    def _is_free(self, i):
+        # One reference is held by the list and one is the temporary reference
+        # created by passing the buffer to `getrefcount`. Any views created
+        # from the buffer hold a reference to it via the `base` attribute.
+        return sys.getrefcount(self._buffers[i]) <= 2
+
+    def _allocate(self, size):
+        self.allocations += 1
+        return np.empty(size, dtype=self._dtype)
+
+    def get(self, shape):
+        '''
+        Return a C-contiguous array of the requested shape
+
+        The contents of the array are undefined.
+        '''
+        size = int(np.prod(shape))
+        with self._lock:
+            for i in range(len(self._buffers)):
+                if self._is_free(i):
+                    if self._buffers[i].size < size:
+                        self._buffers[i] = self._allocate(size)
+                    return self._buffers[i][:size].reshape(shape)
+
+            # All buffers are in use by consumers that have retained them. If
+            # the pool is full, hand the oldest retained buffer over to its
+            # consumers and replace it with a new one.
+            buffer = self._allocate(size)
+            if len(self._buffers) >= self._n_buffers:
+                log.debug('All buffers in pool retained, allocating new buffer')
+                self._buffers.pop(0)
+            self._buffers.append(buffer)
+            return buffer[:size].reshape(shape)
+
+
 def octave_space(lb, ub, step):
     '''
     >>> freq = octave_space(4, 32, 1)
@@ -0,0 +1,160 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+from scipy import signal
+
+from psi.data.io import FilteredSignal, parse_predicate, Recording, Signal
+from psi.data.io.cache import cache
+
+
+class ArraySignal(Signal):
+
+    chunk_samples = 100
+    block_samples = 250
+
+    def __init__(self, array, fs):
+        self.array = array
+        self.fs = fs
+        self.reads = []
+
+    def __getitem__(self, slice):
+        self.reads.append((slice.start, slice.stop))
+        return self.array[slice]
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    @property
+    def duration(self):
+        return self.shape[-1]/self.fs
+
+
+@pytest.fixture
+def eeg():
+    data = np.random.default_rng(0).normal(size=10000)
+    return ArraySignal(data, 1000)
+
+
+def test_gather(eeg):
+    indices = np.array([5000, 10, 20, 9000, 130, 990, 1000, 9900, 1050])
+    actual = eeg.gather(indices, 100)
+    expected = np.vstack([eeg.array[i:i+100] for i in indices])
+    np.testing.assert_array_equal(actual, expected)
+
+    # Each chunk must only be read once and reads must be aligned to chunk
+    # boundaries.
+    chunks = []
+    for lb, ub in eeg.reads:
+        assert lb % eeg.chunk_samples == 0
+        chunks.extend(range(lb // 100, -(-ub // 100)))
+    assert len(chunks) == len(set(chunks))
+    assert sorted(chunks) == chunks
+    assert 30 not in chunks
+
+
+def test_get_segments(eeg):
+    times = np.array([0.5, 0.1, 9.995, 2.0])
+    df = eeg.get_segments(times, -1e-3, 10e-3)
+    assert df.shape == (4, 10)
+    np.testing.assert_array_equal(df.index.values, times)
+    np.testing.assert_array_equal(df.loc[0.1].values, eeg.array[99:109])
+    np.testing.assert_array_equal(df.loc[2.0].values, eeg.array[1999:2009])
+    assert np.isnan(df.loc[9.995].values).all()
+
+
+def test_filter(eeg):
+    sos = signal.iirfilter(1, (50/500, 300/500), btype='band', ftype='butter',
+                           output='sos')
+    expected = signal.sosfiltfilt(sos, eeg.array, padlen=0)
+
+    filtered = eeg.filter(50, 300)
+    np.testing.assert_allclose(filtered[:], expected)
+    assert eeg.filter(50, 300) is filtered
+
+    # Reads from the source signal should be aligned to chunks.
+    for lb, ub in eeg.reads:
+        assert lb % eeg.chunk_samples == 0
+
+    times = np.array([0.5, 2.0])
+    df = eeg.get_segments_filtered(times, -1e-3, 10e-3, 50, 300,
+                                   detrend=None)
+    np.testing.assert_allclose(df.loc[0.5].values, expected[499:509])
+
+
+def test_filter_persist(eeg, tmp_path):
+    filename = tmp_path / 'filtered.npy'
+    expected = eeg.filter(50, 300)
+    actual = FilteredSignal(eeg, 50, 300, filename=filename)
+    assert filename.exists()
+    np.testing.assert_allclose(actual[:], expected[:])
+
+    # Second load should not read the source signal.
+    eeg.reads = []
+    actual = FilteredSignal(eeg, 50, 300, filename=filename)
+    assert eeg.reads == []
+    assert isinstance(actual.array, np.memmap)
+    np.testing.assert_allclose(actual[:], expected[:])
+
+
+class TrialRecording(Recording):
+
+    _select_table = 'trials'
+
+    @cache
+    def get_levels(self):
+        return self.trials[['level']].astype(float)
+
+
+@pytest.fixture
+def recording(tmp_path):
+    trials = pd.DataFrame({
+        'frequency': np.repeat([4000.0, 8000.0], 4),
+        'level': np.tile([20, 40, 60, 80], 2),
+        'ear': ['left', 'right'] * 4,
+    })
+    trials.to_csv(tmp_path / 'trials.csv', index=False)
+    return TrialRecording(tmp_path)
+
+
+def test_parse_predicate():
+    assert parse_predicate('level__ge')[0] == 'level'
+    assert parse_predicate('level__ge')[1](40, 40)
+    assert parse_predicate('level')[0] == 'level'
+    assert parse_predicate('target_tone__level')[0] == 'target_tone__level'
+
+
+def test_query(recording):
+    assert recording.query('trials', frequency=8000).tolist() == [4, 5, 6, 7]
+    assert recording.query('trials', frequency=8000, level__ge=40).tolist() \
+        == [5, 6, 7]
+    assert recording.query('trials', level__in=[20, 80],
+                           ear__ne='left').tolist() == [3, 7]
+    with pytest.raises(ValueError):
+        recording.query('trials')
+
+
+def test_select(recording):
+    selected = recording.select(frequency=8000, level__ge=40)
+    assert selected.selection == {'frequency': 8000, 'level__ge': 40}
+    assert selected.trials.index.tolist() == [5, 6, 7]
+    assert selected.trials['level'].tolist() == [40, 60, 80]
+    assert len(recording.trials) == 8
+
+    selected = selected.select(level__lt=80)
+    assert selected.trials.index.tolist() == [5, 6]
+    assert selected.selection == \
+        {'frequency': 8000, 'level__ge': 40, 'level__lt': 80}
+
+    with pytest.raises(NotImplementedError):
+        Recording(recording.base_path).select(level=20)
+
+
+def test_select_cache(recording):
+    # Both selections have the same predicates, but not the same rows.
+    chained = recording.select(level__ge=60).select(level__ge=40)
+    selected = recording.select(level__ge=40)
+    assert chained.get_levels()['level'].tolist() == [60, 80, 60, 80]
+    assert selected.get_levels()['level'].tolist() == \
+        [40, 60, 80, 40, 60, 80]
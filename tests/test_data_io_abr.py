@@ -0,0 +1,50 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from psi.data.io.array_tools import ArrayWriter
+
+
+@pytest.fixture
+def abr_file(tmp_path):
+    bcolz = pytest.importorskip('bcolz')
+    from psi.data.io.abr import ABRFile
+
+    erp_metadata = pd.DataFrame({
+        'target_tone_frequency': np.repeat([4000.0, 8000.0], 4),
+        'target_tone_level': np.tile([20.0, 40.0, 60.0, 80.0], 2),
+        'averages': 1,
+        'reject_threshold': 10.0,
+        't0': np.arange(8) * 0.1 + 0.1,
+    })
+    bcolz.ctable.fromdataframe(erp_metadata,
+                               rootdir=str(tmp_path / 'erp_metadata'),
+                               mode='w')
+    writer = ArrayWriter(tmp_path / 'eeg', 'float64', 1000)
+    writer.append(np.random.default_rng(0).normal(size=2000))
+    writer.close()
+    return ABRFile(tmp_path)
+
+
+@pytest.mark.parametrize('archive', [False, True])
+def test_abr_select(abr_file, archive):
+    if archive:
+        # Loading the full table archives it to CSV.
+        abr_file.erp_metadata
+        assert (abr_file.base_path / 'erp_metadata.csv').exists()
+
+    # Columns can be referenced without the `target_tone_` prefix.
+    assert abr_file.query('erp_metadata', frequency=4000).tolist() == \
+        [0, 1, 2, 3]
+    with pytest.raises(KeyError):
+        abr_file.query('erp_metadata', phase=0)
+
+    selected = abr_file.select(frequency=8000, level__ge=40)
+    actual = selected.erp_metadata
+    expected = abr_file.erp_metadata.iloc[[5, 6, 7]]
+    pd.testing.assert_frame_equal(actual, expected)
+
+    epochs = selected.get_epochs(duration=5e-3)
+    assert epochs.shape == (3, 5)
+    assert epochs.index.get_level_values('level').tolist() == [40, 60, 80]
@@ -0,0 +1,89 @@
+import pytest
+
+import numpy as np
+
+from psi.data.io import Recording
+from psi.data.io import array_tools
+from psi.data.io.array_tools import ArraySignal, ArrayWriter
+
+
+def test_writer(tmp_path):
+    data = np.random.default_rng(0).normal(size=1000)
+    writer = ArrayWriter(tmp_path / 'eeg', 'float32', 1000, expectedlen=300,
+                         source='eeg_channel')
+    for i in range(0, 1000, 150):
+        writer.append(data[i:i+150])
+    assert writer.shape == (1000,)
+    np.testing.assert_array_equal(writer[100:200],
+                                  data[100:200].astype('float32'))
+
+    # Readable while still being written to.
+    signal = ArraySignal(tmp_path / 'eeg')
+    assert signal.shape == (1000,)
+    assert signal.attrs == {'fs': 1000, 'source': 'eeg_channel'}
+    np.testing.assert_array_equal(signal[:], data.astype('float32'))
+
+    writer.close()
+    size = (tmp_path / 'eeg.npy').stat().st_size
+    assert size == array_tools.HEADER_SIZE + 1000 * 4
+    np.testing.assert_array_equal(np.load(tmp_path / 'eeg.npy'),
+                                  data.astype('float32'))
+
+
+def test_writer_multichannel(tmp_path):
+    data = np.random.default_rng(0).normal(size=(4, 500))
+    writer = ArrayWriter(tmp_path / 'eeg', 'float64', 1000, expectedlen=100)
+    writer.append(data[:, :200])
+    writer.append(data[:, 200:])
+    with pytest.raises(ValueError):
+        writer.append(data[:2])
+
+    array = np.load(tmp_path / 'eeg.npy', mmap_mode='r')
+    assert array.flags.f_contiguous
+    np.testing.assert_array_equal(array, data)
+    np.testing.assert_array_equal(writer[:, 10:20], data[:, 10:20])
+
+
+def test_recording(tmp_path):
+    data = np.random.default_rng(0).normal(size=10000)
+    writer = ArrayWriter(tmp_path / 'eeg', 'float64', 1000)
+    writer.append(data)
+    # The writer is not closed to simulate a crash during acquisition.
+
+    recording = Recording(tmp_path)
+    assert recording.array_names == {'eeg'}
+    assert isinstance(recording.eeg, ArraySignal)
+    assert recording.eeg.fs == 1000
+    assert recording.eeg.duration == 10
+
+    times = np.array([0.5, 2.0])
+    df = recording.eeg.get_segments(times, -1e-3, 10e-3)
+    np.testing.assert_array_equal(df.loc[2.0].values, data[1999:2009])
+
+
+def test_signal_multichannel(tmp_path):
+    data = np.random.default_rng(0).normal(size=(2, 10000))
+    writer = ArrayWriter(tmp_path / 'eeg', 'float64', 1000)
+    writer.append(data)
+    writer.close()
+
+    signal = Recording(tmp_path).eeg
+    assert signal.n_channels == 2
+    assert signal.duration == 10
+    # Indexing applies to the time axis.
+    np.testing.assert_array_equal(signal[100:110], data[:, 100:110])
+    with pytest.raises(ValueError):
+        signal.get_segments([0.5], 0, 10e-3)
+    with pytest.raises(ValueError):
+        signal.filter(50, 300)
+
+    times = np.array([0.5, 2.0])
+    for i in range(2):
+        channel = signal.channel(i)
+        assert channel.n_channels == 1
+        df = channel.get_segments(times, -1e-3, 10e-3)
+        np.testing.assert_array_equal(df.loc[2.0].values, data[i, 1999:2009])
+        filtered = channel.filter(50, 300)
+        assert filtered.shape == (10000,)
+    # Filtered channels are cached separately.
+    assert len(list(tmp_path.glob('cache/*.npy'))) == 2
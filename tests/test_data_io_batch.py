@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from psi.data.io.batch import atomic_write, exit_status, process_batch
+
+
+def process(filename, fail_on=None):
+    if filename == fail_on:
+        raise ValueError('Bad data')
+    with atomic_write(filename) as tmp_filename:
+        with open(tmp_filename, 'w') as fh:
+            fh.write(str(os.getpid()))
+    return True
+
+
+def test_atomic_write(tmp_path):
+    filename = tmp_path / 'result.csv'
+    with pytest.raises(ValueError):
+        with atomic_write(filename) as tmp_filename:
+            assert tmp_filename.endswith('.csv')
+            open(tmp_filename, 'w').close()
+            raise ValueError
+    assert list(tmp_path.iterdir()) == []
+
+    with atomic_write(filename) as tmp_filename:
+        open(tmp_filename, 'w').close()
+    assert list(tmp_path.iterdir()) == [filename]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_process_batch(tmp_path, workers):
+    filenames = [str(tmp_path / f'{i}.txt') for i in range(4)]
+    report_file = tmp_path / 'report.csv'
+    records = []
+    report = process_batch(process, filenames, fail_on=filenames[1],
+                           workers=workers, progress=records.append,
+                           report=report_file)
+    assert len(records) == 4
+    assert report['filename'].tolist() == filenames
+    assert report['status'].tolist() == \
+        ['processed', 'error', 'processed', 'processed']
+    assert report.loc[1, 'error'] == 'ValueError: Bad data'
+    assert 'Traceback' in report.loc[1, 'traceback']
+    assert report_file.exists()
+    assert not os.path.exists(filenames[1])
+    assert exit_status(report) == 1
+    assert exit_status(report.drop(1)) == 0
+    if workers == 1:
+        assert (report['pid'] == os.getpid()).all()
+    else:
+        assert (report['pid'] != os.getpid()).all()
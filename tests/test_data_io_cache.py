@@ -0,0 +1,122 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from psi.data.io import cache
+from psi.data.io.cache import (get_signal_cache_file, load_dataframe,
+                               save_dataframe)
+
+
+class Recording:
+
+    _cache_sources = ['eeg']
+    _selection = None
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.calls = []
+        (base_path / 'eeg').mkdir()
+        self.write_eeg(b'data')
+
+    def write_eeg(self, data):
+        (self.base_path / 'eeg' / 'data.blp').write_bytes(data)
+
+    @cache.cache
+    def get_epochs(self, offset=0, duration=8.5e-3, averages=None):
+        self.calls.append((offset, duration, averages))
+        return make_epochs(offset, duration)
+
+
+def make_epochs(offset, duration, n=4):
+    t = np.arange(offset, offset+duration, 1e-3)
+    index = pd.MultiIndex.from_arrays([
+        np.array([1e3, 1e3, 2e3, 2e3]),
+        np.array([-1, 1, -1, 1]),
+        np.array(['a', 'b', 'a', 'b'], dtype=object),
+        np.arange(n) * 0.1,
+    ], names=['frequency', 'polarity', 'label', 't0'])
+    columns = pd.Index(t, name='time')
+    values = np.random.default_rng(0).normal(size=(n, len(t)))
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+def test_save_dataframe(tmp_path):
+    filename = tmp_path / 'test.npz'
+    expected = make_epochs(0, 5e-3)
+    save_dataframe(filename, expected, note='test')
+    actual, attrs = load_dataframe(filename)
+    pd.testing.assert_frame_equal(actual, expected, check_index_type=False)
+    assert attrs == {'note': 'test'}
+
+    expected = expected.reset_index(['frequency', 'polarity', 'label'],
+                                    drop=True)
+    save_dataframe(filename, expected)
+    actual, attrs = load_dataframe(filename)
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_cache(tmp_path):
+    recording = Recording(tmp_path)
+    expected = recording.get_epochs(offset=-1e-3)
+    actual = recording.get_epochs(-1e-3)
+    pd.testing.assert_frame_equal(actual, expected, check_index_type=False)
+    assert len(recording.calls) == 1
+
+    # Simulates a new session.
+    recording = Recording.__new__(Recording)
+    recording.base_path = tmp_path
+    recording.calls = []
+    recording.get_epochs(offset=-1e-3, averages=np.inf)
+    recording.get_epochs(offset=-1e-3)
+    assert recording.calls == [(-1e-3, 8.5e-3, np.inf)]
+
+    recording.get_epochs(offset=-1e-3, refresh_cache=True)
+    assert len(recording.calls) == 2
+
+    # Results for a subset of epochs are cached separately.
+    recording._selection = np.array([1, 3])
+    recording.get_epochs(offset=-1e-3)
+    assert len(recording.calls) == 3
+    recording._selection = None
+
+    # Changing the source data invalidates the cache.
+    recording.write_eeg(b'new data')
+    recording.get_epochs(offset=-1e-3)
+    recording.get_epochs(offset=-1e-3)
+    assert len(recording.calls) == 4
+
+
+def test_evict(tmp_path, monkeypatch):
+    recording = Recording(tmp_path)
+    recording.get_epochs(offset=0)
+    size = sum(p.stat().st_size for p in tmp_path.glob('cache/*.npz'))
+    monkeypatch.setattr(cache, 'MAX_CACHE_SIZE', size * 2.5)
+
+    recording.get_epochs(offset=1)
+    recording.get_epochs(offset=0)      # Marks offset=0 as recently used
+    recording.get_epochs(offset=2)      # Evicts offset=1
+    assert len(list(tmp_path.glob('cache/*.npz'))) == 2
+    assert len(recording.calls) == 3
+
+    recording.get_epochs(offset=0)
+    recording.get_epochs(offset=1)
+    assert [c[0] for c in recording.calls] == [0, 1, 2, 1]
+
+
+def test_evict_signal_cache(tmp_path, monkeypatch):
+    (tmp_path / 'eeg.npy').write_bytes(b'data')
+    monkeypatch.setattr(cache, 'MAX_SIGNAL_CACHE_SIZE', 2500)
+
+    filenames = []
+    for lb in (100, 200, 300, 100, 400):
+        filename = get_signal_cache_file(tmp_path / 'eeg.npy', 'filtered', lb)
+        if not filename.exists():
+            filename.write_bytes(b'0' * 1000)
+        filenames.append(filename)
+
+    # The second file was the least-recently used when the budget was
+    # exceeded. The file being created is only counted on the next call.
+    assert filenames[0] == filenames[3]
+    assert sorted(tmp_path.glob('cache/*.npy')) == \
+        sorted([filenames[0], filenames[2], filenames[4]])
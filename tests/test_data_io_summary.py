@@ -0,0 +1,49 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from psi.data.io.summary import (load_series, load_waveforms, save_series,
+                                 save_waveforms)
+
+
+@pytest.fixture
+def waveforms():
+    index = pd.MultiIndex.from_arrays([
+        np.array([1e3, 1e3, 2e3, 2e3]),
+        np.array([10, 20, 10, 20]),
+        np.array([-1, 1, -1, 1]),
+        np.arange(4) * 0.1,
+    ], names=['frequency', 'level', 'polarity', 't0'])
+    columns = pd.Index(np.arange(-10, 90) / 1e4, name='time')
+    values = np.random.default_rng(0).normal(size=(4, len(columns)))
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+@pytest.mark.parametrize('ext', ['csv', 'npz'])
+def test_waveforms(tmp_path, waveforms, ext):
+    filename = tmp_path / f'individual waveforms.{ext}'
+    save_waveforms(waveforms, filename)
+    actual = load_waveforms(filename)
+    pd.testing.assert_frame_equal(actual, waveforms, check_exact=False,
+                                  check_index_type=False)
+
+    average = waveforms.groupby(['frequency', 'level']).mean()
+    save_waveforms(average, filename)
+    pd.testing.assert_frame_equal(load_waveforms(filename), average,
+                                  check_exact=False, check_index_type=False)
+
+
+@pytest.mark.parametrize('ext', ['csv', 'npz'])
+def test_series(tmp_path, waveforms, ext):
+    filename = tmp_path / f'number of epochs.{ext}'
+    epoch_n = waveforms.groupby(['frequency', 'level']).size()
+    epoch_n.name = 'epoch_n'
+    save_series(epoch_n, filename)
+    pd.testing.assert_series_equal(load_series(filename), epoch_n,
+                                   check_index_type=False)
+
+
+def test_unsupported_format(tmp_path, waveforms):
+    with pytest.raises(ValueError):
+        save_waveforms(waveforms, tmp_path / 'waveforms.txt')
@@ -0,0 +1,25 @@
+from psi.controller.api import (EpochOutput, ExtractEpochs, HardwareAIChannel,
+                                HardwareAOChannel)
+
+
+def test_get_channels_cache(engine):
+    ao_channel = HardwareAOChannel(name='ao', fs=1000, parent=engine)
+    ai_channel = HardwareAIChannel(name='ai', fs=1000, parent=engine)
+
+    assert engine.get_channels() == ()
+    assert engine.get_channels(active=False) == (ao_channel, ai_channel)
+
+    # Adding an output to a channel should activate it.
+    ao_channel.add_output(EpochOutput())
+    assert engine.get_channels() == (ao_channel,)
+
+    # Input channels are active only if one of the inputs in the processing
+    # chain is active.
+    epochs = ExtractEpochs()
+    ai_channel.add_input(epochs)
+    assert engine.get_channels(direction='input') == ()
+    epochs.add_callback(lambda x: None)
+    assert engine.get_channels(direction='input') == (ai_channel,)
+
+    ai_channel.set_parent(None)
+    assert engine.get_channels(active=False) == (ao_channel,)
@@ -44,3 +44,73 @@ def test_evaluate(complex_experiment_action):
     context = {'experiment_end': False, 'task_active': True}
     result = complex_experiment_action.match(context)
     assert result == False
+
+
+@pytest.fixture
+def controller():
+    from psi.controller.plugin import ControllerPlugin
+    controller = ControllerPlugin()
+    events = ['event_{}'.format(i) for i in range(50)]
+    controller._events = {e: None for e in events}
+    context = {e: False for e in events}
+    context['task_active'] = False
+    controller._action_context = context
+    return controller
+
+
+def register_actions(controller, n_actions=500):
+    invoked = []
+    for i in range(n_actions):
+        event = 'event_{}'.format(i % 50)
+        if i % 2:
+            event = '{} and not task_active'.format(event)
+        cb = lambda i=i, **kw: invoked.append(i)
+        controller.register_action(event, cb)
+    # Evaluated on every event since it does not depend on an event.
+    controller.register_action('not task_active', lambda **kw: invoked.append(-1))
+    return invoked
+
+
+def test_action_dispatch(controller):
+    invoked = register_actions(controller)
+    assert controller.event_used('event_3')
+    assert not controller.event_used('event_50')
+
+    controller._invoke_actions('event_3')
+    assert invoked == list(range(3, 500, 50)) + [-1]
+
+    # Make sure the index gives the same result as evaluating every action.
+    for event_name in ('event_7', 'task_start', 'event_7', 'task_end'):
+        del invoked[:]
+        controller._invoke_actions(event_name)
+        context = controller._action_context.copy()
+        context[event_name] = True
+        actions = controller._actions
+        expected = [i for i, a in enumerate(actions[:-1]) if a.match(context)]
+        if actions[-1].match(context):
+            expected.append(-1)
+        assert invoked == expected
+
+
+def test_action_dispatch_speed(benchmark, controller):
+    invoked = register_actions(controller)
+    controller._invoke_actions('event_0')
+
+    def invoke():
+        for i in range(50):
+            controller._invoke_actions('event_{}'.format(i))
+
+    benchmark(invoke)
+    # 50 events/round, so events/s is 50 / mean round time.
+    assert len(invoked) > 0
+
+
+def test_action_dispatch_non_boolean(controller):
+    # Actions that depend on names other than events and state flags must be
+    # evaluated on every event since those names need not be boolean.
+    controller.register_action('event_1 and not task_active',
+                               lambda **kw: None)
+    controller.register_action('event_1 or level > 40', lambda **kw: None)
+    gated, ungated = controller._actions
+    assert controller._get_event_actions('event_1') == [gated, ungated]
+    assert controller._get_event_actions('event_2') == [ungated]
@@ -75,6 +75,52 @@ class TestExpressionNamespace(unittest.TestCase):
         self.assertEqual(values['f'], 31)
 
 
+def make_chained_expressions(n=250):
+    # Each item depends on the previous two, with a few constants mixed in.
+    expressions = {'x0': '1', 'x1': '2'}
+    for i in range(2, n):
+        if i % 10 == 0:
+            expressions['x{}'.format(i)] = str(i)
+        else:
+            expressions['x{}'.format(i)] = 'x{} + x{} % 7'.format(i-1, i-2)
+    return expressions
+
+
+def test_chained_evaluation():
+    expressions = make_chained_expressions()
+    ns = ExpressionNamespace(expressions)
+    values = ns.get_values()
+    assert len(values) == len(expressions)
+    for i in range(2, len(expressions)):
+        if i % 10 != 0:
+            expected = values['x{}'.format(i-1)] + values['x{}'.format(i-2)] % 7
+            assert values['x{}'.format(i)] == expected
+
+    # Values that are set explicitly are not recomputed and the expressions
+    # they depend on are not evaluated.
+    ns.reset()
+    ns.set_values({'x5': 1000, 'x6': 2000})
+    assert ns.get_value('x7') == 2000 + 1000 % 7
+    assert 'x4' not in ns.get_values(['x7'])
+
+
+def test_circular_dependency():
+    ns = ExpressionNamespace({'a': 'b+1', 'b': 'c+1', 'c': 'a+1'})
+    with pytest.raises(ValueError):
+        ns.get_value('a')
+
+
+def test_get_values_speed(benchmark):
+    ns = ExpressionNamespace(make_chained_expressions())
+
+    def get_values():
+        ns.reset()
+        return ns.get_values()
+
+    values = benchmark(get_values)
+    assert len(values) == 250
+
+
 class ANT(Atom):
 
     observed = Bool()
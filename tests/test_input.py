@@ -1,7 +1,8 @@
 import numpy as np
 import pytest
 
-from psi.controller.input import (accumulate, blocked, concatenate, coroutine,
+from psi.controller.input import (accumulate, blocked, Blocked, Callback,
+                                  Chunk, concatenate, coroutine, Input,
                                   InputData)
 
 
@@ -71,3 +72,56 @@ def test_pipeline_flush(data, pipeline):
     assert data[0].shape == (4, 10)
     assert np.array_equal(expected, data[0])
     assert data[0].metadata == expected.metadata
+
+
+def test_chunk_indexing():
+    chunk = Chunk(np.random.uniform(size=(2, 100)), s0=1000, fs=1000)
+    assert chunk[..., 10:].s0 == 1010
+    assert chunk[..., -10:].s0 == 1090
+    assert chunk[0].s0 == 1000
+    assert chunk[0][25:50].s0 == 1025
+    assert chunk[np.newaxis].shape == (1, 2, 100)
+    assert chunk[np.newaxis].s0 == 1000
+    assert chunk[0, 5:].t0 == 1.005
+    assert np.array_equal(chunk[1, 5:], chunk.data[1, 5:])
+    with pytest.raises(IndexError):
+        chunk[..., ::2]
+
+
+def test_chunk_pipeline(data, pipeline):
+    expected = []
+    metadata = {'n': 5}
+    for i in range(8):
+        d = Chunk(np.random.uniform(size=5), s0=i*5, fs=1000,
+                  metadata=metadata)
+        pipeline.send(d)
+        expected.append(d.data)
+    expected = np.concatenate(expected).reshape((-1, 10))
+
+    assert len(data) == 1
+    assert isinstance(data[0], Chunk)
+    assert data[0].shape == (4, 10)
+    assert data[0].s0 == 0
+    assert np.array_equal(expected, data[0])
+    assert data[0].metadata == metadata
+
+
+def test_input_chunk_adapters(ao_channel):
+    # The source of the root input only needs to provide the sampling rate.
+    chunks, arrays = [], []
+    root = Input(name='root')
+    root.source = ao_channel
+    blocked = Blocked(name='blocked', duration=10e-3)
+    root.add_input(blocked)
+    blocked.add_callback(chunks.append, chunks=True)
+    blocked.add_callback(arrays.append)
+
+    cb = root._get_target(source_chunks=False)
+    for i in range(3):
+        cb(np.arange(i*5, (i+1)*5))
+
+    assert [c.s0 for c in chunks] == [0]
+    assert isinstance(chunks[0], Chunk)
+    assert isinstance(arrays[0], InputData)
+    assert np.array_equal(chunks[0], np.arange(10))
+    assert np.array_equal(arrays[0], np.arange(10))
@@ -41,3 +41,106 @@ def test_queue_delay(queued_epoch_output, tb1, tb2):
     queued_epoch_output.get_samples(100, ramp_samples, out)
     queued_epoch_output.get_samples(ramp_samples + 100, ramp_samples, out)
     assert np.sqrt(np.mean(out**2)) == pytest.approx(1.0)
+
+
+def make_settings(output):
+    import enaml
+    with enaml.imports():
+        from psi.controller.output_manifest import load_items
+        from psi.token.primitives import Cos2Envelope, Tone
+
+    token = Cos2Envelope()
+    Tone(parent=token)
+    output.name = 'target'
+    output.token = token
+    load_items(output, token)
+
+    settings = []
+    for frequency in (100, 200):
+        for duration in (0.1, 0.2):
+            settings.append({
+                'target_envelope_start_time': 0,
+                'target_envelope_rise_time': 0.01,
+                'target_envelope_duration': duration,
+                'target_tone_frequency': frequency,
+                'target_tone_level': 0,
+                'target_tone_phase': 0,
+                'target_tone_polarity': 1,
+                'target_iti_duration': 0.05,
+            })
+    return settings
+
+
+def test_add_settings(queued_epoch_output):
+    settings = make_settings(queued_epoch_output)
+
+    queue = queued_epoch_output.queue
+    queued_epoch_output.add_settings(settings, averages=2)
+    assert queue.count_factories() == 4
+    assert queue.count_trials() == 8
+
+    for setting, data in zip(settings, list(queue._data.values())):
+        assert data['metadata'] is setting
+        assert data['duration'] == setting['target_envelope_duration']
+        assert next(data['delays']) == 0.05
+
+        context = setting.copy()
+        del context['target_iti_duration']
+        queued_epoch_output.add_setting(context, 1, 0)
+        key = queue._ordering[-1]
+        factory = queue._data[key]['source']
+        expected = factory.next(factory.get_remaining_samples())
+        np.testing.assert_allclose(data['source'], expected, atol=1e-9)
+
+
+def test_prerender(queued_epoch_output, tmp_path, monkeypatch):
+    from psi.controller import output
+    from psi.token.bank import WaveformBank
+    monkeypatch.setattr(output, 'STIMULUS_BANK', WaveformBank('stimuli',
+                                                              tmp_path))
+
+    settings = make_settings(queued_epoch_output)
+    queue = queued_epoch_output.queue
+    # Add each setting twice to check that identical waveforms are only
+    # rendered once.
+    for setting in settings + settings:
+        queued_epoch_output.add_setting(setting, 2)
+
+    expected = []
+    for data in queue._data.values():
+        factory = data['source']
+        factory.reset()
+        expected.append(factory.next(factory.get_remaining_samples()))
+
+    queued_epoch_output.prerender(max_workers=2)
+    files = list(tmp_path.glob('*.npy'))
+    assert len(files) == 1
+    bank = np.load(files[0])
+    assert len(bank) == sum(len(e) for e in expected[:4])
+
+    for e, data in zip(expected, queue._data.values()):
+        assert isinstance(data['source'], np.ndarray)
+        np.testing.assert_allclose(data['source'], e)
+
+    # A new session with identical settings should reuse the bank.
+    mtime = files[0].stat().st_mtime_ns
+    monkeypatch.setattr(output, 'STIMULUS_BANK', WaveformBank('stimuli',
+                                                              tmp_path))
+    for key in list(queue._data):
+        queue.remove_key(key)
+    for setting in settings:
+        queued_epoch_output.add_setting(setting, 2)
+    queued_epoch_output.prerender(max_workers=1)
+    assert files[0].stat().st_mtime_ns == mtime
+    for e, data in zip(expected, queue._data.values()):
+        np.testing.assert_allclose(data['source'], e)
+
+    # A bank rendered by an earlier version must not be reused.
+    from psi.token import bank
+    monkeypatch.setattr(bank, 'BANK_VERSION', bank.BANK_VERSION + 1)
+    for key in list(queue._data):
+        queue.remove_key(key)
+    for setting in settings:
+        queued_epoch_output.add_setting(setting, 2)
+    queued_epoch_output.prerender(max_workers=1)
+    assert len(list(tmp_path.glob('*.npy'))) == 2
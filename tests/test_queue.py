@@ -87,3 +87,18 @@ def test_queue(queue, tone1, tone2):
     # Set resolution to a fraction of a sample
     assert conn.popleft()[0]['t0'] == pytest.approx(0, abs=0.1/100e3)
     assert conn.popleft()[0]['t0'] == pytest.approx(2, abs=0.1/100e3)
+
+
+def test_queue_replace_sources():
+    queue = FIFOSignalQueue()
+    queue.set_fs(1e3)
+    k1 = queue.append(np.zeros(10), 1, metadata={'level': 20})
+    k2 = queue.append(np.zeros(20), 1, metadata={'level': 40})
+    sources = list(queue.iter_sources())
+    assert [(k, s.shape, m) for k, s, m in sources] == \
+        [(k1, (10,), {'level': 20}), (k2, (20,), {'level': 40})]
+
+    queue.replace_sources({k2: np.ones(20)})
+    _, source, _ = list(queue.iter_sources())[1]
+    np.testing.assert_array_equal(source, np.ones(20))
+    assert queue.count_factories() == 2
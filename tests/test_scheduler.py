@@ -0,0 +1,58 @@
+import threading
+import time
+
+from psi.controller.scheduler import Scheduler
+
+
+def test_scheduler_order():
+    scheduler = Scheduler()
+    fired = []
+    done = threading.Event()
+
+    scheduler.schedule_in('c', 30e-3, lambda: (fired.append('c'), done.set()))
+    scheduler.schedule_in('a', 10e-3, lambda: fired.append('a'))
+    scheduler.schedule_in('b', 20e-3, lambda: fired.append('b'))
+    scheduler.schedule_in('d', 15e-3, lambda: fired.append('d'))
+    assert scheduler.pending() == ['a', 'd', 'b', 'c']
+    assert scheduler.cancel('d')
+    assert not scheduler.cancel('d')
+
+    assert done.wait(1)
+    assert fired == ['a', 'b', 'c']
+    assert scheduler.pending() == []
+
+    # Jitter depends on the load of the machine running the tests, so only
+    # check that events are never fired early.
+    stats = scheduler.get_stats()
+    assert stats['n'] == 3
+    assert stats['min'] >= 0
+
+
+def test_scheduler_reschedule():
+    t0 = time.perf_counter()
+    scheduler = Scheduler(clock=lambda: time.perf_counter() - t0)
+    fired = []
+    done = threading.Event()
+    cb = lambda: (fired.append(scheduler.clock()), done.set())
+
+    # Rescheduling an event with the same name replaces the pending one.
+    scheduler.schedule_at('event', 10e-3, cb)
+    scheduler.schedule_at('event', 40e-3, cb)
+    assert done.wait(1)
+    time.sleep(20e-3)
+    assert len(fired) == 1
+    # Only the replacement fired. There is no upper bound since the callback
+    # may be delayed on a loaded machine.
+    assert fired[0] >= 40e-3 - 1e-3
+    assert scheduler.get_stats()['n'] == 1
+
+
+def test_scheduler_cancel_all():
+    scheduler = Scheduler()
+    fired = []
+    for i in range(100):
+        scheduler.schedule_in(str(i), 10e-3 + i*1e-4, lambda: fired.append(i))
+    scheduler.cancel_all()
+    time.sleep(50e-3)
+    assert fired == []
+    assert scheduler.pending() == []
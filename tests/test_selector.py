@@ -6,7 +6,7 @@ from copy import deepcopy
 import numpy as np
 
 from psi.context.api import Parameter
-from psi.context.selector import SequenceSelector
+from psi.context.selector import CartesianProduct, SequenceSelector
 
 
 class TestSettingSequence(unittest.TestCase):
@@ -47,3 +47,60 @@ class TestSettingSequence(unittest.TestCase):
         self.assertFalse(c1 == c2)
         self.assertFalse(c2 == c3)
         self.assertTrue(c3 == c4)
+
+@pytest.fixture
+def product_selector():
+    selector = CartesianProduct()
+    for name in ('a', 'b', 'c'):
+        item = Parameter(name=name, default=1.0)
+        selector.append_item(item)
+        for i in range(100):
+            selector.add_setting(item, i)
+    return selector
+
+
+def test_cartesian_product_sequence(product_selector):
+    a, b, c = product_selector.context_items
+    sequence = product_selector.get_sequence()
+    assert len(sequence) == 100**3
+    assert sequence[0] == {a: 0, b: 0, c: 0}
+    assert product_selector.setting_at(12345) == {a: 1, b: 23, c: 45}
+    assert sequence[-1] == {a: 99, b: 99, c: 99}
+
+    iterator = product_selector.get_iterator(cycles=1)
+    assert next(iterator) == sequence[0]
+    assert next(iterator) == sequence[1]
+
+
+def test_cartesian_product_permutation(product_selector):
+    a, b, c = product_selector.context_items
+    s1 = product_selector.get_sequence(seed=1)
+    s2 = product_selector.get_sequence(seed=1)
+    s3 = product_selector.get_sequence(seed=2)
+    assert len(s1) == 100**3
+    assert [s1[i] for i in range(10)] == [s2[i] for i in range(10)]
+    assert [s1[i] for i in range(10)] != [s3[i] for i in range(10)]
+
+    # Check that the first 1000 settings are all unique.
+    keys = {tuple(s1[i].values()) for i in range(1000)}
+    assert len(keys) == 1000
+
+
+def test_sequence_selector_setting_at():
+    item = Parameter(name='level', default=1.0)
+    selector = SequenceSelector(order='descending')
+    selector.append_item(item)
+    for level in (20, 60, 40):
+        selector.add_setting({'level': level})
+    assert selector.setting_at(0) == {item: 60}
+    assert len(selector.get_sequence()) == 3
+    selector.set_value(0, item, 80)
+    assert selector.setting_at(0) == {item: 80}
+    iterator = selector.get_iterator(cycles=1)
+    assert list(iterator) == selector.get_sequence()
+
+
+def test_cartesian_product_setting_at_speed(benchmark, product_selector):
+    sequence = product_selector.get_sequence(seed=1)
+    result = benchmark(sequence.__getitem__, 500000)
+    assert len(result) == 3
@@ -1,6 +1,9 @@
+import pytest
+
 import numpy as np
 import pandas as pd
 import random
+from types import SimpleNamespace
 
 from psi.data.sinks.api import TableStore
 
@@ -51,3 +54,67 @@ def test_table_append_10k_rows_speed(benchmark):
     store.process_table(data)
     row = _random_row()
     benchmark(store.process_table, row)
+
+
+def make_epochs(epoch_data, levels, samples, offset=0):
+    data = []
+    for i, (level, n) in enumerate(zip(levels, samples)):
+        data.append({
+            'signal': np.arange(n) + offset + i * 1000.0,
+            'info': {
+                'metadata': {'level': level},
+                't0': i,
+                'duration': n / epoch_data.fs,
+            },
+        })
+    epoch_data.append(data)
+
+
+@pytest.fixture
+def epoch_data(tmp_path):
+    pytest.importorskip('bcolz')
+    from psi.data.sinks.bcolz_store import BColzStore
+    store = BColzStore()
+    store.set_base_path(tmp_path)
+    context_items = {'level': SimpleNamespace(dtype='float64')}
+    store.create_ai_epochs('epochs', 1000.0, 0, 'float64', context_items)
+    return store.get_source('epochs')
+
+
+def test_epoch_index(epoch_data):
+    make_epochs(epoch_data, [20, 40], [10, 10])
+    make_epochs(epoch_data, [20, 40, 60], [10, 10, 5], offset=100)
+    offsets, samples = epoch_data.get_epoch_index()
+    np.testing.assert_array_equal(offsets, [0, 10, 20, 30, 40])
+    np.testing.assert_array_equal(samples, [10, 10, 10, 10, 5])
+
+    # Reads are done in blocks, each of which may contain several epochs.
+    epoch_data.block_samples = 15
+    epochs = epoch_data.get_epoch_groups('level')
+    np.testing.assert_array_equal(epochs[20], [np.arange(10),
+                                               np.arange(10) + 100])
+    np.testing.assert_array_equal(epochs[40], [np.arange(10) + 1000,
+                                               np.arange(10) + 1100])
+    np.testing.assert_array_equal(epochs[60], [np.arange(5) + 2100])
+
+
+def test_epoch_index_fallback(epoch_data):
+    # Data saved before the index was added.
+    epoch_data.index = None
+    make_epochs(epoch_data, [20, 40, 20, 40], [10, 5, 10, 5])
+    offsets, samples = epoch_data.get_epoch_index()
+    np.testing.assert_array_equal(offsets, [0, 10, 15, 25])
+    np.testing.assert_array_equal(samples, [10, 5, 10, 5])
+
+    epochs = epoch_data.get_epoch_groups('level')
+    np.testing.assert_array_equal(epochs[20], [np.arange(10),
+                                               np.arange(10) + 2000])
+    np.testing.assert_array_equal(epochs[40], [np.arange(5) + 1000,
+                                               np.arange(5) + 3000])
+
+
+def test_epoch_groups_length(epoch_data):
+    make_epochs(epoch_data, [20, 20], [10, 5])
+    with pytest.raises(ValueError):
+        epoch_data.get_epoch_groups('level')
+    assert epoch_data.get_epoch_groups('t0')[1].shape == (1, 5)
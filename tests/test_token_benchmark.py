@@ -0,0 +1,169 @@
+'''
+Benchmarks for token synthesis and queue playout
+
+Run with pytest-benchmark. For example, to save results for comparison
+between releases::
+
+    pytest tests/test_token_benchmark.py --benchmark-json=token.json
+    pytest tests/test_token_benchmark.py --benchmark-compare
+
+Each benchmark also stores the number of samples generated per call,
+throughput (samples/s) and the peak memory allocated by a single call (as
+measured by tracemalloc) in `extra_info`, which is included in the JSON
+output.
+'''
+import tracemalloc
+
+import pytest
+import enaml
+import numpy as np
+
+from psi.controller.calibration.api import FlatCalibration
+from psi.controller.calibration.calibration import GolayCalibration
+from psi.controller.queue import FIFOSignalQueue
+
+with enaml.imports():
+    from psi.token import primitives
+
+
+FS = [25e3, 100e3]
+CHUNK_SAMPLES = [1024, 16384]
+DURATIONS = [5e-3, 1.0]
+
+
+def run_benchmark(benchmark, fn, samples):
+    tracemalloc.start()
+    fn()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    benchmark(fn)
+
+    benchmark.extra_info['samples'] = samples
+    benchmark.extra_info['peak_bytes'] = peak
+    if benchmark.stats is not None:
+        mean = benchmark.stats.stats.mean
+        benchmark.extra_info['samples_per_s'] = samples/mean
+
+
+@pytest.fixture
+def calibration():
+    return FlatCalibration.from_spl(94)
+
+
+def golay_calibration():
+    # Flat calibration with a known impulse response, used for equalizing
+    # noise.
+    cal_fs = 200e3
+    frequency = np.fft.rfftfreq(4096, 1/cal_fs)
+    sensitivity = np.zeros_like(frequency)
+    phase = np.zeros_like(frequency)
+    return GolayCalibration(frequency, sensitivity, fs=cal_fs, phase=phase)
+
+
+def make_tone(fs, calibration):
+    return primitives.ToneFactory(fs, 60, 1000, calibration=calibration)
+
+
+def make_noise(fs, calibration, equalize=False):
+    if equalize:
+        calibration = golay_calibration()
+    return primitives.BandlimitedNoiseFactory(
+        fs=fs, seed=1, level=60, fl=500, fh=4e3, filter_rolloff=1,
+        passband_attenuation=1, stopband_attenuation=60, equalize=equalize,
+        calibration=calibration)
+
+
+def make_equalized_noise(fs, calibration):
+    return make_noise(fs, calibration, equalize=True)
+
+
+def make_square_wave(fs, calibration):
+    return primitives.SquareWaveFactory(fs, 1, 40, 0.5)
+
+
+def make_sam(fs, calibration):
+    return primitives.SAMEnvelopeFactory(fs, 1, 40, 0, 1, calibration,
+                                         make_tone(fs, calibration))
+
+
+CARRIERS = {
+    'tone': make_tone,
+    'noise': make_noise,
+    'equalized_noise': make_equalized_noise,
+    'square_wave': make_square_wave,
+    'sam_tone': make_sam,
+}
+
+
+@pytest.mark.benchmark(group='carrier')
+@pytest.mark.parametrize('chunk_samples', CHUNK_SAMPLES)
+@pytest.mark.parametrize('fs', FS)
+@pytest.mark.parametrize('name', CARRIERS)
+def test_carrier(benchmark, calibration, name, fs, chunk_samples):
+    factory = CARRIERS[name](fs, calibration)
+    out = np.empty(chunk_samples)
+    run_benchmark(benchmark, lambda: factory.next(chunk_samples, out=out),
+                  chunk_samples)
+
+
+def make_tone_pip(fs, duration, calibration):
+    return primitives.Cos2EnvelopeFactory(fs, 0, duration*0.1, duration,
+                                          make_tone(fs, calibration))
+
+
+def make_gated_noise(fs, duration, calibration):
+    return primitives.GateFactory(fs, 0, duration,
+                                  make_noise(fs, calibration))
+
+
+def make_chirp(fs, duration, calibration):
+    return primitives.ChirpFactory(fs, 250, fs*0.4, duration, 60, calibration)
+
+
+EPOCHS = {
+    'tone_pip': make_tone_pip,
+    'gated_noise': make_gated_noise,
+    'chirp': make_chirp,
+}
+
+
+@pytest.mark.benchmark(group='epoch')
+@pytest.mark.parametrize('duration', DURATIONS)
+@pytest.mark.parametrize('fs', FS)
+@pytest.mark.parametrize('name', EPOCHS)
+def test_epoch(benchmark, calibration, name, fs, duration):
+    # Includes creating the factory since a new factory is created for each
+    # trial.
+    samples = int(round(fs*duration))
+    out = np.empty(samples)
+
+    def render():
+        factory = EPOCHS[name](fs, duration, calibration)
+        return factory.next(samples, out=out)
+
+    run_benchmark(benchmark, render, samples)
+
+
+@pytest.mark.benchmark(group='queue')
+@pytest.mark.parametrize('source', ['factory', 'waveform'])
+@pytest.mark.parametrize('chunk_samples', CHUNK_SAMPLES)
+@pytest.mark.parametrize('fs', FS)
+def test_pop_buffer(benchmark, calibration, source, fs, chunk_samples):
+    duration = 5e-3
+    queue = FIFOSignalQueue()
+    queue.set_fs(fs)
+    queue.set_t0(0)
+    for frequency in (1e3, 2e3, 4e3, 8e3):
+        tone = primitives.ToneFactory(fs, 60, frequency,
+                                      calibration=calibration)
+        token = primitives.Cos2EnvelopeFactory(fs, 0, 0.5e-3, duration, tone)
+        if source == 'waveform':
+            token = token.next(int(round(fs*duration)))
+        # Use a very large number of trials so the queue never empties.
+        queue.append(token, 10**9, delays=20e-3, duration=duration)
+
+    run_benchmark(benchmark, lambda: queue.pop_buffer(chunk_samples),
+                  chunk_samples)
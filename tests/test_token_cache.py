@@ -0,0 +1,76 @@
+import pytest
+
+import numpy as np
+
+from psi.controller.calibration.api import FlatCalibration, InterpCalibration
+from psi.token import cache
+from psi.token.cache import content_key, fast_cache
+
+
+def make_counted(**kwargs):
+    calls = []
+    @fast_cache(**kwargs)
+    def f(*args, **kw):
+        calls.append(args)
+        return len(calls)
+    return f, calls
+
+
+def test_lru_eviction():
+    f, calls = make_counted(maxsize=2)
+    f(1)
+    f(2)
+    f(1)
+    f(3)        # Evicts 2, which is the least-recently used
+    f(1)
+    assert calls == [(1,), (2,), (3,)]
+    f(2)
+    assert calls == [(1,), (2,), (3,), (2,)]
+
+    info = f.cache_info()
+    assert info.hits == 2
+    assert info.misses == 4
+    assert info.maxsize == 2
+    assert info.currsize == 2
+
+    f.cache_clear()
+    assert f.cache_info().currsize == 0
+
+
+def test_calibration_key():
+    f, calls = make_counted()
+    frequency = np.array([1e3, 2e3, 4e3])
+    cal1 = InterpCalibration(frequency, np.array([90, 80, 70]))
+    cal2 = InterpCalibration(frequency, np.array([90, 80, 70]))
+    cal3 = InterpCalibration(frequency, np.array([90, 80, 71]))
+    assert content_key(cal1) == content_key(cal2)
+    assert content_key(cal1) != content_key(cal3)
+    assert content_key(cal1) != content_key(FlatCalibration(90))
+
+    # A reloaded calibration with the same content should hit the cache.
+    f(100e3, cal1)
+    f(100e3, cal2)
+    f(100e3, calibration=cal2)
+    f(100e3, cal3)
+    assert f.cache_info().hits == 1
+    assert len(calls) == 3
+
+
+def test_persist(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'get_cache_folder', lambda *a: tmp_path)
+    monkeypatch.setattr(cache, 'persist_enabled', lambda: True)
+
+    def design(fs, calibration, fl=None):
+        return np.arange(fs), calibration.sensitivity
+
+    f1 = fast_cache(design, persist=True)
+    f2 = fast_cache(design, persist=True)
+    result = f1(10, FlatCalibration(90), fl=1)
+    assert f1.cache_info().misses == 1
+    assert len(list(tmp_path.glob('*.pkl'))) == 1
+
+    # Simulates a new session
+    expected = f2(10, FlatCalibration(90), fl=1)
+    assert f2.cache_info().disk_hits == 1
+    assert f2.cache_info().misses == 0
+    np.testing.assert_array_equal(result[0], expected[0])
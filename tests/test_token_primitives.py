@@ -60,3 +60,248 @@ def test_square_wave(benchmark):
 
     factory = primitives.SquareWaveFactory(fs, level, frequency, duty_cycle)
     actual = benchmark(factory.next, samples)
+
+
+def reference_tone(fs, level, frequency, phase, polarity, offset, samples):
+    t = (np.arange(samples, dtype=np.double) + offset)/fs
+    return polarity*level*np.cos(2*np.pi*t*frequency + phase)
+
+
+@pytest.mark.parametrize('frequency', [1000, 4123.5, 32e3])
+def test_tone_factory(frequency):
+    fs = 100e3
+    factory = primitives.ToneFactory(fs, 2, frequency, phase=0.3, polarity=-1)
+    chunks = [1, 500, 9000, 17, 20000, 4096]
+    actual = np.concatenate([factory.next(c) for c in chunks])
+    expected = reference_tone(fs, 2, frequency, 0.3, -1, 0, sum(chunks))
+    np.testing.assert_allclose(actual, expected, atol=1e-9)
+
+    # Check writing into a buffer supplied by the caller and that the phase
+    # continues from the prior chunks.
+    out = np.empty(1000)
+    result = factory.next(1000, out=out)
+    assert result is out
+    expected = reference_tone(fs, 2, frequency, 0.3, -1, sum(chunks), 1000)
+    np.testing.assert_allclose(out, expected, atol=1e-9)
+
+    factory.reset()
+    expected = reference_tone(fs, 2, frequency, 0.3, -1, 0, 500)
+    np.testing.assert_allclose(factory.next(500), expected, atol=1e-9)
+
+    # The waveform should not depend on how it is chunked.
+    factory.reset()
+    np.testing.assert_array_equal(factory.next(sum(chunks)), actual)
+
+
+def test_tone_factory_continuous_speed(benchmark):
+    factory = primitives.ToneFactory(100e3, 1, 1000)
+    out = np.empty(100000)
+    benchmark(factory.next, 100000, out=out)
+
+
+def test_tone_factory_pip_speed(benchmark):
+    # 5 ms tone pip generated from a new factory (as done for each trial when
+    # generating ABR stimuli).
+    def pip():
+        return primitives.ToneFactory(100e3, 1, 8000).next(500)
+    benchmark(pip)
+
+
+@pytest.fixture
+def noise_bank(tmp_path, monkeypatch):
+    from psi.token.bank import WaveformBank
+    bank = WaveformBank('noise', tmp_path)
+    monkeypatch.setattr(primitives, 'NOISE_BANK', bank)
+    return tmp_path
+
+
+def make_noise_factory(frozen, level=60, seed=1):
+    from psi.controller.calibration.api import FlatCalibration
+    calibration = FlatCalibration.from_spl(94)
+    return primitives.BandlimitedNoiseFactory(
+        fs=100e3, seed=seed, level=level, fl=1e3, fh=8e3, filter_rolloff=1,
+        passband_attenuation=1, stopband_attenuation=60, equalize=False,
+        calibration=calibration, frozen=frozen, bank_duration=0.1)
+
+
+def test_frozen_noise(noise_bank):
+    fresh = make_noise_factory(False)
+    frozen = make_noise_factory(True)
+    assert len(list(noise_bank.glob('*.npy'))) == 1
+
+    chunks = [100, 5000, 2500]
+    for c in chunks:
+        np.testing.assert_allclose(frozen.next(c), fresh.next(c))
+
+    # Reset should restart from the beginning of the bank, and the bank should
+    # loop once the end is reached.
+    frozen.reset()
+    out = np.empty(25000)
+    assert frozen.next(25000, out=out) is out
+    np.testing.assert_array_equal(out[:10000], out[10000:20000])
+
+    # Changing the level should reuse the existing bank.
+    louder = make_noise_factory(True, level=60+20*np.log10(2))
+    assert len(list(noise_bank.glob('*.npy'))) == 1
+    np.testing.assert_allclose(louder.next(1000), out[:1000]*2)
+
+    # Changing the seed should render a new bank.
+    make_noise_factory(True, seed=2)
+    assert len(list(noise_bank.glob('*.npy'))) == 2
+
+
+def test_frozen_noise_version(noise_bank, monkeypatch):
+    from psi.token import bank
+    make_noise_factory(True)
+    make_noise_factory(True)
+    assert len(list(noise_bank.glob('*.npy'))) == 1
+
+    # Banks rendered by an earlier version must not be reused.
+    monkeypatch.setattr(bank, 'BANK_VERSION', bank.BANK_VERSION + 1)
+    make_noise_factory(True)
+    assert len(list(noise_bank.glob('*.npy'))) == 2
+
+
+def test_frozen_noise_speed(benchmark, noise_bank):
+    factory = make_noise_factory(True)
+    def trial():
+        factory.reset()
+        return factory.next(5000)
+    benchmark(trial)
+
+
+def test_fresh_noise_speed(benchmark):
+    factory = make_noise_factory(False)
+    def trial():
+        factory.reset()
+        return factory.next(5000)
+    benchmark(trial)
+
+
+def reference_cos2envelope(fs, offset, samples, start_time, rise_time,
+                           duration):
+    t = (np.arange(samples, dtype=np.double) + offset)/fs - start_time
+    envelope = np.ones(samples)
+    m = t < rise_time
+    envelope[m] = primitives.cos2ramp(t[m], rise_time, 0)
+    m = t >= (duration - rise_time)
+    envelope[m] = primitives.cos2ramp(t[m]-(duration-rise_time), rise_time,
+                                      np.pi/2)
+    envelope[(t < 0) | (t >= duration)] = 0
+    return envelope
+
+
+@pytest.mark.parametrize('start_time', [0, 1e-3, 0.55e-3])
+@pytest.mark.parametrize('duration', [5e-3, 50e-3, np.inf])
+def test_cos2envelope_fragments(start_time, duration):
+    fs = 100e3
+    rise_time = 0.5e-3
+    samples = 10000
+    expected = reference_cos2envelope(fs, 0, samples, start_time, rise_time,
+                                      duration)
+    actual = primitives.cos2envelope(fs, 0, samples, start_time, rise_time,
+                                     duration)
+    np.testing.assert_allclose(actual, expected, atol=1e-12)
+
+    # GateFactory requires a finite duration.
+    if duration == np.inf:
+        return
+
+    for chunk_samples in (1, 7, 100, 3333):
+        factory = primitives.Cos2EnvelopeFactory(
+            fs, start_time, rise_time, duration,
+            primitives.SilenceFactory(fill_value=1))
+        chunks = []
+        for lb in range(0, samples, chunk_samples):
+            chunks.append(factory.next(min(chunk_samples, samples-lb)))
+        np.testing.assert_array_equal(np.concatenate(chunks), actual)
+
+
+def test_gate_out():
+    fs = 100e3
+    tone = primitives.ToneFactory(fs, 1, 1000)
+    gate = primitives.GateFactory(fs, 1e-3, 2e-3, tone)
+    out = np.full(500, np.nan)
+    assert gate.next(500, out=out) is out
+    expected = reference_tone(fs, 1, 1000, 0, 1, 0, 500)
+    expected[:100] = 0
+    expected[300:] = 0
+    np.testing.assert_allclose(out, expected, atol=1e-9)
+
+
+def test_tone_pip_speed(benchmark):
+    # 5 ms tone pip generated from new factories (as done for each trial when
+    # generating ABR stimuli).
+    out = np.empty(1000)
+    def pip():
+        tone = primitives.ToneFactory(100e3, 1, 8000)
+        envelope = primitives.Cos2EnvelopeFactory(100e3, 0, 0.5e-3, 5e-3,
+                                                  tone)
+        return envelope.next(1000, out=out)
+    benchmark(pip)
+
+
+def test_render_batch():
+    from psi.controller.calibration.api import FlatCalibration
+    fs = 100e3
+    calibration = FlatCalibration.from_spl(94)
+    samples = 1000
+    parameters = {
+        'frequency': [1000, 2000, 1000, 2000, 8000],
+        'level': [80, 80, 60, 40, 20],
+        'polarity': [1, -1, -1, 1, 1],
+        'phase': [0, 0, 0, 0, 0],
+    }
+    env_parameters = {
+        'start_time': [0, 0, 0, 1e-3, 1e-3],
+        'rise_time': [0.5e-3]*5,
+        'duration': [5e-3]*5,
+    }
+
+    tones = primitives.ToneFactory.render_batch(5, samples, parameters,
+                                                fs=fs, calibration=calibration)
+    actual = primitives.Cos2EnvelopeFactory.render_batch(
+        5, samples, env_parameters, fs=fs, input=tones)
+    assert actual.shape == (5, samples)
+
+    for i in range(5):
+        tone = primitives.ToneFactory(
+            fs, calibration=calibration,
+            **{k: v[i] for k, v in parameters.items()})
+        factory = primitives.Cos2EnvelopeFactory(
+            fs, input_factory=tone,
+            **{k: v[i] for k, v in env_parameters.items()})
+        np.testing.assert_allclose(actual[i], factory.next(samples),
+                                   atol=1e-9)
+
+    # Check the default implementation, which creates a factory for each
+    # trial.
+    gate_parameters = {'start_time': [0, 1e-3], 'duration': [1e-3, 2e-3]}
+    input = np.ones((2, 500))
+    expected = primitives.GateFactory.render_batch(
+        2, 500, gate_parameters, fs=fs, input=input.copy())
+    actual = primitives.Waveform.render_batch.__func__(
+        primitives.GateFactory, 2, 500, gate_parameters, fs=fs, input=input)
+    np.testing.assert_array_equal(actual, expected)
+    assert expected[0].sum() == 100
+    assert expected[1, :100].sum() == 0
+    assert expected[1].sum() == 200
+
+
+def test_render_batch_speed(benchmark):
+    # Full ABR stimulus set (8 frequencies, 20 levels and two polarities).
+    fs = 100e3
+    frequency, level, polarity = np.meshgrid(
+        np.geomspace(1e3, 32e3, 8), np.arange(0, 100, 5), [1, -1])
+    n = frequency.size
+    parameters = {'frequency': frequency.ravel(), 'level': level.ravel(),
+                  'polarity': polarity.ravel()}
+    env_parameters = {'start_time': [0]*n, 'rise_time': [0.5e-3]*n,
+                      'duration': [5e-3]*n}
+
+    def render():
+        tones = primitives.ToneFactory.render_batch(n, 500, parameters, fs=fs)
+        return primitives.Cos2EnvelopeFactory.render_batch(
+            n, 500, env_parameters, fs=fs, input=tones)
+
+    assert benchmark(render).shape == (n, 500)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from psi.context.history import TrialHistory
+
+
+def test_trial_history():
+    history = TrialHistory(chunk_size=4, dtypes={'level': 'int64'})
+    for i in range(10):
+        values = {'level': i, 'label': 'trial {}'.format(i)}
+        if i % 3 == 0:
+            values['score'] = True
+        history.append(values)
+
+    assert len(history) == 10
+    assert history.get_values(0) == {'level': 0, 'label': 'trial 0',
+                                     'score': True}
+    assert history.get_values(-2) == {'level': 8, 'label': 'trial 8'}
+    assert history.get_value('label', 5) == 'trial 5'
+    np.testing.assert_array_equal(history.get_column('level'), np.arange(10))
+    assert history.get_column('level').dtype == np.int64
+    np.testing.assert_array_equal(history.get_valid('score'),
+                                  np.arange(10) % 3 == 0)
+
+    with pytest.raises(KeyError):
+        history.get_value('score', 1)
+    with pytest.raises(IndexError):
+        history.get_values(10)
+
+    df = history.to_dataframe()
+    assert len(df) == 10
+    assert df['score'].isnull().sum() == 6
+
+
+def test_trial_history_promotion():
+    history = TrialHistory(chunk_size=4, dtypes={'level': 'int64'})
+    for i in range(6):
+        history.append({'level': i})
+    history.append({'level': 2.5})
+    history.append({'level': 'max'})
+    assert history.get_value('level', 0) == 0
+    assert history.get_value('level', 6) == 2.5
+    assert history.get_value('level', -1) == 'max'
+
+
+def test_trial_history_append_speed(benchmark):
+    values = {'p{}'.format(i): float(i) for i in range(50)}
+
+    def append():
+        history = TrialHistory()
+        for i in range(1000):
+            history.append(values)
+        return history
+
+    history = benchmark(append)
+    assert len(history) == 1000
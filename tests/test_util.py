@@ -1,8 +1,9 @@
+import numpy as np
 import pytest
 
 from atom.api import Atom, Value
 
-from psi.util import get_tagged_values
+from psi.util import BufferPool, get_tagged_values
 
 
 class PreferencesContainer(Atom):
@@ -21,3 +22,31 @@ def preferences():
 def test_get_tagged_values(preferences):
     result = get_tagged_values(preferences, 'preference')
     assert result == {'b': 2, 'd': 4}
+
+
+def test_buffer_pool_reuse():
+    pool = BufferPool(n_buffers=2)
+    data = pool.get((2, 100))
+    assert data.shape == (2, 100)
+    assert data.flags.c_contiguous
+    del data
+
+    # Buffer is no longer referenced, so it should be recycled.
+    data = pool.get((2, 50))
+    assert pool.allocations == 1
+
+
+def test_buffer_pool_retained():
+    pool = BufferPool(n_buffers=2)
+    data = pool.get((2, 100))
+    data[:] = 1
+    retained = data[..., 10:]
+    del data
+
+    # A view onto the buffer is still held, so the pool must not hand out the
+    # same memory.
+    new_data = pool.get((2, 100))
+    new_data[:] = 0
+    assert pool.allocations == 2
+    assert not np.shares_memory(new_data, retained)
+    assert np.all(retained == 1)
@@ -48,6 +48,57 @@ def test_unique_values(workbench):
     assert result == expected
 
 
+def test_settings_table(workbench):
+    context = workbench.get_plugin('psi.context')
+    expected = list(context.iter_settings('default', 1))
+    table = context.get_settings_table('default', 1)
+    assert table.to_dict('records') == expected
+    assert table['repetitions'].tolist() == [2, 10, 15, 20, 20]
+    assert (table['fc'] == 32e3 / table['repetitions']).all()
+
+
+def test_prior_values(workbench):
+    context = workbench.get_plugin('psi.context')
+    context.apply_changes()
+    # Normally set by the `psi.context.initialize` command.
+    context.initialized = True
+    assert context.get_value('repetitions', trial=-1) is None
+
+    context.next_setting('default', save_prior=False)
+    for i in range(5):
+        context.next_setting('default', save_prior=True)
+    assert context.get_value('repetitions', trial=0) == 2
+    assert context.get_values(trial=-1) == \
+        dict(repetitions=20, level=60, fc=32e3/20)
+    assert context.value_changed('repetitions')
+    assert context.get_history()['repetitions'].tolist() == \
+        [2, 10, 15, 20, 20]
+
+
+def test_selector_edit_speed(benchmark, workbench):
+    context = workbench.get_plugin('psi.context')
+    selector = context.selectors['default']
+    item = context.context_items['repetitions']
+    for i in range(1000):
+        selector.add_setting({'repetitions': i})
+    context.apply_changes()
+    assert context.changes_pending == False
+
+    def edit_and_apply():
+        selector.set_value(500, item, '5')
+        assert context.changes_pending == True
+        context.apply_changes()
+
+    benchmark(edit_and_apply)
+    assert context.changes_pending == False
+
+    # Reverting only restores the modified selector.
+    selector.set_value(500, item, '8')
+    context.revert_changes()
+    assert selector.get_value(500, item) == '5'
+    assert context.changes_pending == False
+
+
 def test_update(workbench):
     '''
     Tests whether the change detection algorithm works as intended.